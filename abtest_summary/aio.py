@@ -0,0 +1,363 @@
+import asyncio
+import json
+import random
+import time
+from urllib.parse import urlencode
+
+from .cache import PublishCache
+from .create import (
+    RETRYABLE_STATUSES,
+    SHEET_IDS_FIELDS,
+    GoogleSheetABTest,
+    PublishResult,
+    _instrumented,
+)
+from .pruning import Pruning
+
+SHEETS_API_URL = "https://sheets.googleapis.com/v4/spreadsheets"
+
+
+class AiohttpTransport:
+    """
+    An authorized aiohttp session for the Sheets REST API.
+
+    Connections are kept alive in a pool of max_connections, and the access token
+    is refreshed under a lock, off the event loop, so concurrent requests trigger
+    a single refresh. Requires aiohttp.
+    """
+
+    def __init__(
+        self, credentials, max_connections: int = 10, timeout: float | None = None
+    ):
+
+        self.credentials = credentials
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._session = None
+        self._refresh_lock = asyncio.Lock()
+
+    def _get_session(self):
+        if self._session is None:
+            try:
+                import aiohttp
+            except ImportError as e:
+                raise ImportError("Publishing from asyncio requires aiohttp.") from e
+            from .transport import HTTP_TIMEOUT
+
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=aiohttp.ClientTimeout(total=self.timeout or HTTP_TIMEOUT),
+            )
+        return self._session
+
+    async def _get_headers(self):
+        if not self.credentials.valid:
+            async with self._refresh_lock:
+                # Another task may have refreshed while we waited
+                if not self.credentials.valid:
+                    from google.auth.transport.requests import Request
+
+                    await asyncio.to_thread(self.credentials.refresh, Request())
+        headers = {"Content-Type": "application/json"}
+        self.credentials.apply(headers)
+        return headers
+
+    async def request(self, method, url, body=None):
+        """Sends one request and returns its status and raw content."""
+        session = self._get_session()
+        headers = await self._get_headers()
+        async with session.request(method, url, data=body, headers=headers) as response:
+            return response.status, await response.read()
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class AsyncGoogleSheetABTest:
+    """
+    The asyncio counterpart of GoogleSheetABTest: ``create_summary_sheet`` and
+    ``publish_many`` are coroutines, and their Sheets API calls go through a pooled
+    aiohttp session without blocking the event loop.
+
+    Frame preparation, request building, quotas, colors and the cache are those of
+    ``publisher``, the GoogleSheetABTest it wraps; its blocking methods (updates,
+    workbooks, streaming and exports) are only available there. Every publish is
+    single-batch, over the REST API, and its preparation and request building run
+    in worker threads. Use it as an async context manager, or ``await close()``,
+    to release the connections.
+    """
+
+    def __init__(
+        self,
+        spreadsheet_id: str,
+        service_account_file: str,
+        read_requests_per_minute: int = 60,
+        write_requests_per_minute: int = 60,
+        max_connections: int = 10,
+        max_concurrency: int = 4,
+        cache: PublishCache | None = None,
+        transport=None,
+        collect_stats: bool = False,
+        on_event=None,
+    ):
+
+        self.publisher = GoogleSheetABTest(
+            spreadsheet_id,
+            service_account_file,
+            read_requests_per_minute,
+            write_requests_per_minute,
+            max_connections,
+            cache,
+            collect_stats=collect_stats,
+            on_event=on_event,
+        )
+        # Publishes in flight at once in publish_many
+        self.max_concurrency = max_concurrency
+        # Built on first use, unless given here (e.g. testing.FakeAsyncTransport)
+        self._transport = transport
+
+    # Read by _instrumented, and shared with the publisher
+    _get_sheet_title = staticmethod(GoogleSheetABTest._get_sheet_title)
+
+    @property
+    def spreadsheet_id(self):
+        return self.publisher.spreadsheet_id
+
+    @property
+    def collect_stats(self):
+        return self.publisher.collect_stats
+
+    @collect_stats.setter
+    def collect_stats(self, value):
+        self.publisher.collect_stats = value
+
+    @property
+    def on_event(self):
+        return self.publisher.on_event
+
+    @on_event.setter
+    def on_event(self, value):
+        self.publisher.on_event = value
+
+    async def _get_transport(self):
+        if self._transport is None:
+            # The first use reads the service account file: off the event loop
+            credentials = await asyncio.to_thread(lambda: self.publisher.credentials)
+            # Another task may have built it while we waited
+            if self._transport is None:
+                self._transport = AiohttpTransport(
+                    credentials, self.publisher.max_connections
+                )
+        return self._transport
+
+    async def close(self):
+        if self._transport is not None:
+            await self._transport.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _request(
+        self,
+        method,
+        path="",
+        body=None,
+        params=None,
+        quota="write",
+        max_retries=5,
+        retry_statuses=RETRYABLE_STATUSES,
+    ):
+        """
+        Sends one Sheets API call once a token for the given quota is available,
+        retrying with exponential backoff on the errors of retry_statuses (rate
+        limit and server errors by default), and returns its JSON response. Errors
+        are raised as googleapiclient HttpErrors, like those of the blocking client.
+        """
+        import httplib2
+        from googleapiclient.errors import HttpError
+
+        url = f"{SHEETS_API_URL}/{self.spreadsheet_id}{path}"
+        if params:
+            url += "?" + urlencode(params, doseq=True)
+        name = path.lstrip(":") or "get"
+        # Large bodies take a while to serialize: off the event loop
+        data = await asyncio.to_thread(json.dumps, body) if body is not None else None
+        payload_bytes = len(data) if data is not None else 0
+
+        transport = await self._get_transport()
+        publisher = self.publisher
+        if quota == "write":
+            limiter = publisher.write_limiter
+        else:
+            limiter = publisher.read_limiter
+        recorder = publisher._get_recorder()
+        for attempt in range(max_retries + 1):
+            start = time.perf_counter()
+            await limiter.acquire_async()
+            if recorder:
+                recorder.throttled(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            status, content = await transport.request(method, url, data)
+            error_status = status if status >= 400 else None
+            if recorder:
+                recorder.api_call(
+                    name,
+                    time.perf_counter() - start,
+                    status=error_status,
+                    payload_bytes=payload_bytes,
+                )
+            if error_status is None:
+                return json.loads(content)
+            if status not in retry_statuses or attempt == max_retries:
+                raise HttpError(httplib2.Response({"status": status}), content, uri=url)
+            delay = min(64, 2**attempt) + random.random()
+            if recorder:
+                recorder.retry(name, status, delay)
+            await asyncio.sleep(delay)
+
+    async def _batch_update(self, requests):
+        return await self._request(
+            "POST",
+            ":batchUpdate",
+            {"requests": requests},
+            retry_statuses=self.publisher._get_retry_statuses(requests),
+        )
+
+    @_instrumented
+    async def _publish(
+        self,
+        df,
+        experiment_name,
+        variant_mapping=None,
+        p_value_adjustment=None,
+        adjustment_groups=None,
+        sheet_title=None,
+        force_refresh=False,
+        pruning=None,
+    ):
+        """Publishes a summary sheet and reports the outcome as a PublishResult."""
+        from googleapiclient.errors import HttpError
+
+        publisher = self.publisher
+        cache_name = sheet_title or experiment_name
+        experiment_name = publisher._get_sheet_title(experiment_name, sheet_title)
+        url = publisher._url
+
+        def prepare():
+            df_new = publisher._prepare_summary_frame(
+                df, variant_mapping, p_value_adjustment, adjustment_groups, pruning
+            )
+            # Hashing the frame and reading the cache block too
+            cache_key = publisher._get_cache_key(df_new, cache_name, variant_mapping)
+            cached = publisher._get_cached_publish(cache_key, force_refresh)
+            return df_new, cache_key, cached
+
+        with publisher._phase("prepare"):
+            df_new, cache_key, cached = await asyncio.to_thread(prepare)
+        if cached:
+            # Skipped only while the recorded tab still exists
+            with publisher._phase("read"):
+                response = await self._request(
+                    "GET", params={"fields": SHEET_IDS_FIELDS}, quota="read"
+                )
+            cached = publisher._locate_cached_tab(
+                cached, publisher._parse_sheet_ids(response)
+            )
+        if cached:
+            return PublishResult(
+                cached["sheet_title"],
+                status="skipped",
+                sheet_id=cached["sheet_id"],
+                url=url,
+            )
+
+        sheet_id = publisher._new_sheet_id()
+        batches = publisher._iter_batches(
+            publisher._iter_single_batch_requests(sheet_id, experiment_name, df_new)
+        )
+        with publisher._phase("add_sheet"):
+            # The first batch holds the addSheet request
+            first_batch = await asyncio.to_thread(next, batches)
+            try:
+                await self._batch_update(first_batch)
+            except HttpError as e:
+                if "already exists" in str(e):
+                    return PublishResult(experiment_name, status="exists", url=url)
+                else:
+                    raise
+
+        with publisher._phase("write"):
+            # Each batch is built while no other call of this publish is in flight
+            batch = await asyncio.to_thread(next, batches, None)
+            while batch is not None:
+                await self._batch_update(batch)
+                batch = await asyncio.to_thread(next, batches, None)
+
+        publisher._count_rows_written(len(df_new))
+        if cache_key is not None:
+            await asyncio.to_thread(
+                publisher._record_publish, cache_key, experiment_name, sheet_id
+            )
+        return PublishResult(
+            experiment_name, status="created", sheet_id=sheet_id, url=url
+        )
+
+    async def create_summary_sheet(
+        self,
+        df,
+        experiment_name,
+        variant_mapping: dict | None = None,
+        p_value_adjustment: str | None = None,
+        adjustment_groups: list | None = None,
+        force_refresh: bool = False,
+        pruning: Pruning | None = None,
+    ):
+        """
+        Creates and formats a new spreadsheet with the provided data, in as few
+        ``spreadsheets.batchUpdate`` calls as the request size cap allows.
+
+        See ``GoogleSheetABTest.create_summary_sheet`` for the arguments. If the
+        task is cancelled mid-publish, the tab may be left partly written.
+        """
+        result = await self._publish(
+            df,
+            experiment_name,
+            variant_mapping,
+            p_value_adjustment,
+            adjustment_groups,
+            force_refresh=force_refresh,
+            pruning=pruning,
+        )
+
+        self.publisher._report(result)
+        return result
+
+    async def publish_many(self, experiments, max_concurrency: int | None = None):
+        """
+        Publishes several summaries concurrently and returns one PublishResult per experiment.
+
+        Experiments are given as for ``GoogleSheetABTest.publish_many``. At most
+        ``max_concurrency`` publishes (by default the instance's) are in flight at
+        once, and their API calls share the read/write token buckets. Failures are
+        reported in the results instead of raised; cancelling the call cancels every
+        publish still running.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+
+        async def publish(experiment):
+            # Every async publish is single-batch
+            kwargs = {k: v for k, v in experiment.items() if k != "single_batch"}
+            async with semaphore:
+                try:
+                    return await self._publish(**kwargs)
+                except Exception as e:
+                    return self.publisher._get_failed_result(experiment, e)
+
+        experiments = self.publisher._normalize_experiments(experiments)
+        return list(await asyncio.gather(*(publish(exp) for exp in experiments)))
@@ -0,0 +1,128 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .stats import KEY_COLUMNS, SUMMARY_COLUMNS
+
+
+def _resampled_means(rng, values, n_resamples, batch_size):
+    """Draws bootstrap means of values in batches of at most batch_size resamples."""
+    means = np.empty(n_resamples)
+    for start in range(0, n_resamples, batch_size):
+        stop = min(start + batch_size, n_resamples)
+        idx = rng.integers(0, len(values), size=(stop - start, len(values)))
+        means[start:stop] = values[idx].mean(axis=1)
+    return means
+
+
+def _bootstrap_task(control, treatment, alpha, n_resamples, seed, max_batch_elements):
+    """Bootstraps the difference in means of one treatment against its control."""
+    rng = np.random.default_rng(seed)
+    batch_size = max(1, max_batch_elements // max(len(control), len(treatment)))
+
+    ate = treatment.mean() - control.mean()
+    diffs = _resampled_means(rng, treatment, n_resamples, batch_size) - _resampled_means(
+        rng, control, n_resamples, batch_size
+    )
+
+    lower, upper = np.quantile(diffs, [alpha / 2, 1 - alpha / 2])
+    # Two-sided p-value from the bootstrap distribution shifted to the null
+    p_value = (1 + np.count_nonzero(np.abs(diffs - ate) >= abs(ate))) / (
+        n_resamples + 1
+    )
+    return ate, lower, upper, p_value
+
+
+def bootstrap_effects(
+    df,
+    control_variant: str,
+    value_col: str = "value",
+    variant_col: str = "variant_name",
+    alpha: float = 0.05,
+    n_resamples: int = 2000,
+    seed: int = 0,
+    max_workers: int | None = None,
+    max_batch_elements: int = 5_000_000,
+):
+    """
+    Computes bootstrap confidence intervals and p-values from per-unit data.
+
+    ``df`` has one row per unit with the columns in ``KEY_COLUMNS``, ``variant_col``
+    and ``value_col``. Each treatment is compared with the ``control_variant`` units
+    sharing its keys, which must exist. Comparisons are spread over a process pool;
+    each one gets its own child of ``seed`` so results do not depend on scheduling,
+    and resamples are drawn in batches of at most ``max_batch_elements`` values to
+    bound memory per worker. The result has the same columns as ``stats.compute_effects``.
+    """
+    # Missing keys form groups of their own, as in compute_effects
+    groups = df.groupby(KEY_COLUMNS + [variant_col], sort=True, dropna=False).indices
+    values = df[value_col].to_numpy(dtype=float)
+
+    group_keys = pd.MultiIndex.from_tuples(
+        list(groups), names=KEY_COLUMNS + [variant_col]
+    )
+    group_positions = list(groups.values())
+    is_control = group_keys.get_level_values(variant_col) == control_variant
+    treatment_groups = np.flatnonzero(~is_control)
+
+    # Align every treatment group with its control group
+    positions = (
+        group_keys[is_control]
+        .droplevel(variant_col)
+        .get_indexer(group_keys[~is_control].droplevel(variant_col))
+    )
+    unmatched = positions < 0
+    if unmatched.any():
+        example = list(group_keys[treatment_groups[unmatched][0]][:-1])
+        raise ValueError(
+            f"Found no '{control_variant}' units for {unmatched.sum()} treatment "
+            f"variants, e.g. for {example}."
+        )
+    control_groups = np.flatnonzero(is_control)[positions]
+
+    keys = list(group_keys[treatment_groups])
+    tasks = [
+        (values[group_positions[c]], values[group_positions[t]])
+        for c, t in zip(control_groups, treatment_groups)
+    ]
+
+    seeds = np.random.SeedSequence(seed).spawn(len(tasks))
+    args = (
+        [control for control, _ in tasks],
+        [treatment for _, treatment in tasks],
+        [alpha] * len(tasks),
+        [n_resamples] * len(tasks),
+        seeds,
+        [max_batch_elements] * len(tasks),
+    )
+
+    if max_workers == 1:
+        results = list(map(_bootstrap_task, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+            results = list(executor.map(_bootstrap_task, *args))
+
+    results = np.array(results, dtype=float).reshape(-1, 4)
+    keys = pd.DataFrame(keys, columns=KEY_COLUMNS + [variant_col])
+
+    return pd.DataFrame(
+        {
+            "metric_alias": keys["metric_alias"].to_numpy(),
+            "treatment_variant_name": keys[variant_col].to_numpy(),
+            "dimension_name": keys["dimension_name"].to_numpy(),
+            "dimension_value": keys["dimension_value"].to_numpy(),
+            "analysis_type": "Bootstrap",
+            "alpha": alpha,
+            "control_variant_mean": [control.mean() for control, _ in tasks],
+            "treatment_variant_mean": [treatment.mean() for _, treatment in tasks],
+            "p_value": results[:, 3],
+            "ate": results[:, 0],
+            "ate_ci_lower": results[:, 1],
+            "ate_ci_upper": results[:, 2],
+            "control_variant_n": [len(control) for control, _ in tasks],
+            "treatment_variant_n": [len(treatment) for _, treatment in tasks],
+        },
+        columns=SUMMARY_COLUMNS,
+    )
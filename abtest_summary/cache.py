@@ -0,0 +1,93 @@
+import contextlib
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.path.join("~", ".cache", "abtest-summary", "publish.sqlite")
+
+
+class PublishCache:
+    """
+    A local SQLite record of published summaries, keyed by a hash of their content.
+
+    Entries older than ``max_age`` seconds are ignored and evicted, and only the
+    ``max_entries`` most recent publishes are kept.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        max_entries: int = 10_000,
+        max_age: float = 30 * 24 * 3600,
+    ):
+
+        self.path = os.path.expanduser(path)
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS publishes (
+                    key TEXT PRIMARY KEY,
+                    spreadsheet_id TEXT NOT NULL,
+                    sheet_title TEXT NOT NULL,
+                    sheet_id INTEGER,
+                    published_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS publishes_published_at ON publishes (published_at)"
+            )
+
+    @contextlib.contextmanager
+    def _connect(self):
+        with self.lock, contextlib.closing(sqlite3.connect(self.path)) as conn:
+            with conn:
+                yield conn
+
+    def get(self, key: str):
+        """Returns the last publish recorded under key, or None if missing or expired."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT spreadsheet_id, sheet_title, sheet_id, published_at "
+                "FROM publishes WHERE key = ? AND published_at >= ?",
+                (key, time.time() - self.max_age),
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(
+            zip(("spreadsheet_id", "sheet_title", "sheet_id", "published_at"), row)
+        )
+
+    def put(self, key: str, spreadsheet_id: str, sheet_title: str, sheet_id=None):
+        """Records a publish under key and evicts stale entries."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO publishes VALUES (?, ?, ?, ?, ?)",
+                (key, spreadsheet_id, sheet_title, sheet_id, time.time()),
+            )
+            self._evict(conn)
+
+    def _evict(self, conn):
+        conn.execute(
+            "DELETE FROM publishes WHERE published_at < ?",
+            (time.time() - self.max_age,),
+        )
+        conn.execute(
+            "DELETE FROM publishes WHERE key NOT IN "
+            "(SELECT key FROM publishes ORDER BY published_at DESC LIMIT ?)",
+            (self.max_entries,),
+        )
+
+    def invalidate(self, key: str | None = None):
+        """Forgets the publish recorded under key, or every publish when key is None."""
+        with self._connect() as conn:
+            if key is None:
+                conn.execute("DELETE FROM publishes")
+            else:
+                conn.execute("DELETE FROM publishes WHERE key = ?", (key,))
@@ -0,0 +1,166 @@
+import numpy as np
+import pandas as pd
+
+
+def get_columns(data):
+    """
+    Wraps a pandas DataFrame, a pyarrow Table or RecordBatch, or a polars DataFrame
+    in the column accessor the summary preparation works with.
+
+    Arrow and polars inputs are never converted to pandas as a whole: only the
+    columns that are read are materialized, as NumPy arrays, after their
+    computations ran on the Arrow buffers. pyarrow and polars are only imported
+    for their own inputs.
+    """
+    module = type(data).__module__.split(".")[0]
+    if module == "polars":
+        import polars as pl
+
+        # Plain (large) strings rather than string views, for pyarrow.compute
+        return ArrowColumns(data.to_arrow(compat_level=pl.CompatLevel.oldest()))
+    if module == "pyarrow":
+        import pyarrow as pa
+
+        if isinstance(data, pa.RecordBatch):
+            data = pa.Table.from_batches([data])
+        return ArrowColumns(data)
+    return PandasColumns(data)
+
+
+class PandasColumns:
+    """Column access over a pandas DataFrame."""
+
+    def __init__(self, df):
+        self.df = df
+
+    def __contains__(self, name):
+        return name in self.df.columns
+
+    def column(self, name):
+        """Returns a column as a NumPy array, with infinite values as NaN."""
+        values = self.df[name].to_numpy()
+        if values.dtype.kind == "f":
+            values = np.where(np.isinf(values), np.nan, values)
+        return values
+
+    def ratios(self, names, denominator):
+        """Divides each column by the denominator column, NaN where it is 0."""
+        denominator = self.column(denominator).astype(float)
+        denominator = np.where(denominator == 0, np.nan, denominator)
+        # All columns in one pass over the shared denominator
+        values = np.vstack([self.column(name) for name in names]).astype(float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return list(values / denominator)
+
+    def relabel(self, name, value, label):
+        """Returns a column with value replaced by label."""
+        # Missing values compare as missing, not False, on nullable dtypes
+        series = self.df[name]
+        return series.mask(series.eq(value).fillna(False), label).to_numpy()
+
+    def replace(self, name, mapping):
+        """Returns a column with its values mapped, keeping the unmapped ones."""
+        return self.df[name].replace(mapping).to_numpy()
+
+    def frame(self, names):
+        return self.df[names]
+
+
+class ArrowColumns:
+    """Column access over a pyarrow Table, computed with pyarrow.compute."""
+
+    def __init__(self, table):
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        self.table = table
+        self.pa = pa
+        self.pc = pc
+
+    def __contains__(self, name):
+        return name in self.table.column_names
+
+    def _array(self, name):
+        array = self.table.column(name)
+        if self.pa.types.is_dictionary(array.type):
+            # Categorical columns are decoded to their values
+            array = self.pc.cast(array, array.type.value_type)
+        if self.pa.types.is_floating(array.type):
+            array = self.pc.if_else(self.pc.is_inf(array), None, array)
+        return array
+
+    def _to_numpy(self, array):
+        """Converts a column to NumPy: zero-copy for numbers without nulls."""
+        pa, pc = self.pa, self.pc
+        if not (pa.types.is_string(array.type) or pa.types.is_large_string(array.type)):
+            # Nulls become NaN, or None in object arrays
+            return array.to_numpy()
+
+        # Build one Python string per distinct value, as pandas' own conversion does
+        encoded = pc.dictionary_encode(array)
+        if isinstance(encoded, pa.ChunkedArray):
+            encoded = encoded.combine_chunks()
+        strings = np.append(encoded.dictionary.to_numpy(zero_copy_only=False), None)
+        indices = pc.fill_null(encoded.indices, len(strings) - 1)
+        return strings[indices.to_numpy()]
+
+    def column(self, name):
+        """Returns a column as a NumPy array, with infinite values as NaN."""
+        return self._to_numpy(self._array(name))
+
+    def ratios(self, names, denominator):
+        """Divides each column by the denominator column, NaN where it is 0."""
+        pa, pc = self.pa, self.pc
+        denominator = pc.cast(self._array(denominator), pa.float64())
+        denominator = pc.if_else(pc.equal(denominator, 0), None, denominator)
+        return [
+            self._to_numpy(
+                pc.divide(pc.cast(self._array(name), pa.float64()), denominator)
+            ).astype(float)
+            for name in names
+        ]
+
+    def _is_string(self, array):
+        return self.pa.types.is_string(array.type) or self.pa.types.is_large_string(
+            array.type
+        )
+
+    def relabel(self, name, value, label):
+        """Returns a column with value replaced by label; only text columns hold it."""
+        array = self._array(name)
+        if not self._is_string(array):
+            return self._to_numpy(array)
+        return self._to_numpy(
+            self.pc.if_else(self.pc.equal(array, value), label, array)
+        )
+
+    def replace(self, name, mapping):
+        """
+        Returns a column with its values mapped, keeping the unmapped ones, as
+        ``Series.replace`` does: mapped values keep their own type, so numeric ids
+        may be mapped to names.
+        """
+        pa, pc = self.pa, self.pc
+        array = self._array(name)
+        keys, targets = [], []
+        for key, target in mapping.items():
+            # Keys of another type than the column can match none of its values
+            try:
+                pa.scalar(key, type=array.type)
+            except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError, OverflowError):
+                continue
+            keys.append(key)
+            targets.append(target)
+        values = self._to_numpy(array)
+        if not keys:
+            return values
+
+        positions = pc.index_in(array, value_set=pa.array(keys, type=array.type))
+        positions = pc.fill_null(positions, -1).to_numpy()
+        mapped = positions >= 0
+        values = values.astype(object)
+        values[mapped] = np.array(targets, dtype=object)[positions[mapped]]
+        return values
+
+    def frame(self, names):
+        return pd.DataFrame({name: self.column(name) for name in names})
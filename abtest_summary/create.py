@@ -1,9 +1,225 @@
-import gspread
+import contextlib
+import contextvars
+import functools
+import hashlib
+import inspect
+import itertools
+import json
 import numpy as np
-from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
+import pandas as pd
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import date
-from googleapiclient.errors import HttpError
+
+from .cache import PublishCache
+from .columnar import get_columns
+from .instrumentation import PublishStats, Recorder
+from .layout import (
+    BAND_COLOR,
+    FONT_FAMILY,
+    MISSING_VALUE,
+    NUMBER_FORMAT,
+    PERCENT_FORMAT,
+    VALUES_HEADER_COLOR,
+    WHITE,
+    calculate_column_widths,
+    column_letter,
+    get_column_layout,
+    get_conditional_rules,
+    get_display_values,
+    get_summary_layout,
+)
+from .pruning import Pruning, prune_rows
+from .stats import adjust_p_values
+from .throttle import TokenBucket
+
+# Google client libraries are imported where they are first used: they are slow
+# to import and unnecessary to prepare frames or build requests offline.
+SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
+
+# Recommended maximum payload for a single Sheets API request
+MAX_REQUEST_BYTES = 2_000_000
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+# A rate limited call was rejected before running, so any call may be repeated;
+# after a server error it may have been applied all the same
+RATE_LIMIT_STATUSES = {429}
+
+# batchUpdate requests that set cells or properties to given values, so are safe
+# to apply twice. Adding sheets, bandings or rules, and appending or deleting
+# rows, are not.
+IDEMPOTENT_REQUESTS = {
+    "updateCells",
+    "repeatCell",
+    "updateBorders",
+    "updateDimensionProperties",
+}
+
+# Source columns of the summary, in sheet order, and their headers
+COLUMN_HEADERS = {
+    "metric_alias": "Metric",
+    "treatment_variant_name": "Treatment",
+    "dimension_name": "Split",
+    "dimension_value": "Split Value",
+    "analysis_type": "Analysis Type",
+    "alpha": "Alpha",
+    "control_variant_mean": "Control Mean",
+    "treatment_variant_mean": "Treatment Mean",
+    "p_value": "P-Value",
+    # Only shown when a p-value adjustment is requested
+    "adjusted_p_value": "Adj. P-Value",
+    "ate": "ATE",
+    "ate_ci_lower": "ATE Lower",
+    "ate_ci_upper": "ATE Upper",
+    "%_lift": "%Lift",
+    "%_ci_lower": "%Lift Lower",
+    "%_ci_upper": "%Lift Upper",
+}
+
+# Columns computed while preparing the summary rather than read from the input
+DERIVED_COLUMNS = {"adjusted_p_value", "%_lift", "%_ci_lower", "%_ci_upper"}
+
+BORDER_SIDES = ("top", "bottom", "left", "right", "innerHorizontal", "innerVertical")
+
+# Row count formatting templates are compiled with: body ranges then end at
+# row 0, which no real range does, and that marks where the table size goes
+TEMPLATE_ROWS = -1
+
+# Metric, Treatment, Split and Split Value identify a row when updating a sheet
+KEY_SIZE = 4
+
+# Rows per appendCells request when updating a sheet
+APPEND_ROWS = 1000
+
+# What _read_sheet fetches of a tab: ids and grid size, formatting to replace and
+# entered values
+SHEET_READ_FIELDS = (
+    "sheets(properties(sheetId,title,gridProperties(rowCount,columnCount)),"
+    "bandedRanges(bandedRangeId),"
+    "conditionalFormats(ranges(sheetId)),data(rowData(values(userEnteredValue))))"
+)
+
+# What _get_sheet_ids fetches: the title and id of every tab
+SHEET_IDS_FIELDS = "sheets.properties(sheetId,title)"
+
+# Positional fields accepted by publish_many for tuple experiments
+EXPERIMENT_FIELDS = ("df", "experiment_name", "variant_mapping")
+
+# Columns of the index tab of a workbook, one row per experiment tab
+INDEX_HEADERS = ["Experiment", "Rows", "Significant", "Positive", "Negative"]
+
+
+@functools.lru_cache(maxsize=None)
+def _get_discovery_document():
+    """Reads the Sheets v4 discovery document bundled with googleapiclient, once."""
+    from googleapiclient.discovery_cache import get_static_doc
+
+    return get_static_doc("sheets", "v4")
+
+
+@dataclass
+class PublishResult:
+    """The outcome of publishing one summary sheet."""
+
+    experiment_name: str
+    status: str
+    sheet_id: int | None = None
+    url: str | None = None
+    error: Exception | None = None
+    # Cell and row counts of an in-place update
+    changes: dict | None = None
+    # Per-phase timings and API traffic, when instrumentation is enabled
+    stats: PublishStats | None = None
+
+
+# Recorder of the publish running in the current thread or asyncio task, if any
+_RECORDER = contextvars.ContextVar("abtest_summary_recorder", default=None)
+
+
+def _instrumented(method):
+    """
+    Records the phases and API calls of a publish method, or coroutine, when
+    instrumentation is enabled, and attaches the stats to its result. Nested calls
+    share one recorder. A workbook, whose method returns a list of results, is
+    recorded as one publish named after its index tab.
+    """
+    signature = inspect.signature(method)
+
+    def start(self, args, kwargs):
+        if (self.on_event is None and not self.collect_stats) or _RECORDER.get():
+            return None, None
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        arguments = bound.arguments
+        if "experiment_name" in arguments:
+            title = self._get_sheet_title(
+                arguments["experiment_name"], arguments.get("sheet_title")
+            )
+        else:
+            title = self._get_sheet_title(arguments["index_name"] or "Workbook")
+        recorder = Recorder(title, self.on_event)
+        return recorder, _RECORDER.set(recorder)
+
+    def finish(recorder, result, started_at):
+        if isinstance(result, list):
+            # The tabs of a workbook share their API calls, hence their stats
+            for tab_result in result:
+                tab_result.stats = recorder.stats
+            statuses = {tab_result.status for tab_result in result}
+            status = next(
+                (s for s in ("created", "exists") if s in statuses), "skipped"
+            )
+        else:
+            result.stats = recorder.stats
+            status = result.status
+        recorder.finish(status, time.perf_counter() - started_at)
+        return result
+
+    def fail(recorder, error, started_at):
+        # The stats travel with the error, for publish_many to report them
+        error.publish_stats = recorder.stats
+        recorder.finish("failed", time.perf_counter() - started_at)
+
+    if inspect.iscoroutinefunction(method):
+
+        @functools.wraps(method)
+        async def async_wrapper(self, *args, **kwargs):
+            recorder, token = start(self, args, kwargs)
+            if recorder is None:
+                return await method(self, *args, **kwargs)
+            started_at = time.perf_counter()
+            try:
+                result = await method(self, *args, **kwargs)
+            except Exception as e:
+                fail(recorder, e, started_at)
+                raise
+            finally:
+                _RECORDER.reset(token)
+            return finish(recorder, result, started_at)
+
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        recorder, token = start(self, args, kwargs)
+        if recorder is None:
+            return method(self, *args, **kwargs)
+        started_at = time.perf_counter()
+        try:
+            result = method(self, *args, **kwargs)
+        except Exception as e:
+            fail(recorder, e, started_at)
+            raise
+        finally:
+            _RECORDER.reset(token)
+        return finish(recorder, result, started_at)
+
+    return wrapper
 
 
 class GoogleSheetABTest:
@@ -11,11 +227,46 @@ class GoogleSheetABTest:
     A class to manage the creation and formatting of a Google Spreadsheet containing AB test results.
     """
 
-    def __init__(self, spreadsheet_id: str, service_account_file: str):
+    def __init__(
+        self,
+        spreadsheet_id: str,
+        service_account_file: str,
+        read_requests_per_minute: int = 60,
+        write_requests_per_minute: int = 60,
+        max_connections: int = 10,
+        cache: PublishCache | None = None,
+        service=None,
+        gc=None,
+        collect_stats: bool = False,
+        on_event=None,
+    ):
 
         self.service_account_file = service_account_file
         self.spreadsheet_id = spreadsheet_id
 
+        # Sheets API quotas are enforced per minute, separately for reads and writes
+        self.read_limiter = TokenBucket(read_requests_per_minute)
+        self.write_limiter = TokenBucket(write_requests_per_minute)
+
+        # Optional record of past publishes, used to skip unchanged summaries
+        self.cache = cache
+
+        # Compiled formatting requests, by column layout and formatting settings
+        self._formatting_templates = {}
+
+        # Instrumentation: stats on every PublishResult and/or a PublishEvent hook
+        self.collect_stats = collect_stats
+        self.on_event = on_event
+
+        # Clients are built on first use and share one pooled, authorized session,
+        # unless given here (e.g. the in-memory fakes of abtest_summary.testing)
+        self.max_connections = max_connections
+        self._client_lock = threading.Lock()
+        self._credentials = None
+        self._session = None
+        self._gc = gc
+        self._service = service
+
         # Colors and formatting
         self.header_border_color = {"red": 0.984, "green": 0.737, "blue": 0.015}
         self.positive_back = {"red": 0.718, "green": 0.882, "blue": 0.804}
@@ -25,87 +276,114 @@ class GoogleSheetABTest:
         self.mid_back = {"red": 0.988, "green": 0.910, "blue": 0.698}
         self.mid_text = {"red": 0.984, "green": 0.737, "blue": 0.015}
 
-        self.credentials = Credentials.from_service_account_file(
-            self.service_account_file,
-            scopes=["https://www.googleapis.com/auth/spreadsheets"],
-        )
-        self.gc = gspread.authorize(self.credentials)
-        self.service = build("sheets", "v4", credentials=self.credentials)
-
-    def _calculate_column_widths(self, df, header_only_cols=None, padding=5):
-        """Calculates optimal column widths based on content."""
-        if header_only_cols is None:
-            header_only_cols = range(4, 15)
-
-        widths = []
-        for i, col in enumerate(df.columns):
-            if i in header_only_cols:
-                max_len = len(str(col))
-            else:
-                max_len = max([len(str(col))] + [len(str(v)) for v in df[col]])
-            widths.append(max_len + padding)
-        return widths
+    @property
+    def _url(self):
+        return f"https://docs.google.com/spreadsheets/d/{self.spreadsheet_id}"
+
+    @property
+    def credentials(self):
+        with self._client_lock:
+            if self._credentials is None:
+                from google.oauth2.service_account import Credentials
+
+                self._credentials = Credentials.from_service_account_file(
+                    self.service_account_file, scopes=SCOPES
+                )
+            return self._credentials
+
+    @property
+    def session(self):
+        if self._session is None:
+            credentials = self.credentials
+            with self._client_lock:
+                if self._session is None:
+                    from .transport import SharedSession
+
+                    self._session = SharedSession(credentials, self.max_connections)
+        return self._session
+
+    @property
+    def gc(self):
+        if self._gc is None:
+            session = self.session
+            with self._client_lock:
+                if self._gc is None:
+                    import gspread
+
+                    self._gc = gspread.Client(self._credentials, session=session)
+        return self._gc
+
+    @property
+    def service(self):
+        if self._service is None:
+            session = self.session
+            with self._client_lock:
+                if self._service is None:
+                    from googleapiclient.discovery import build_from_document
+
+                    from .transport import HttplibAdapter
+
+                    # Built from the bundled document, never fetched over the network
+                    self._service = build_from_document(
+                        _get_discovery_document(), http=HttplibAdapter(session)
+                    )
+        return self._service
 
     def _generate_column_width_requests(self, sheet_id, widths):
+        """Sizes the columns, with one request per run of adjacent equal widths."""
         requests = []
-        for i, char_len in enumerate(widths):
-            pixel_size = int(char_len * 7.2)
+        start = 0
+        for pixel_size, run in itertools.groupby(int(w * 7.2) for w in widths):
+            end = start + len(list(run))
             requests.append(
                 {
                     "updateDimensionProperties": {
                         "range": {
                             "sheetId": sheet_id,
                             "dimension": "COLUMNS",
-                            "startIndex": i,
-                            "endIndex": i + 1,
+                            "startIndex": start,
+                            "endIndex": end,
                         },
                         "properties": {"pixelSize": pixel_size},
                         "fields": "pixelSize",
                     }
                 }
             )
+            start = end
         return requests
 
-    def _get_white_borders_body_request(self, sheet_id):
+    @staticmethod
+    def _get_borders(color):
+        """Returns solid borders of one color on every side, sharing one Border."""
+        border = {"style": "SOLID", "color": color}
+        return {side: border for side in BORDER_SIDES}
+
+    def _get_white_borders_body_request(self, sheet_id, num_rows, num_columns):
         return {
             "updateBorders": {
                 "range": {
                     "sheetId": sheet_id,
                     "startRowIndex": 1,
-                    "endRowIndex": 1000,
+                    "endRowIndex": num_rows + 1,
                     "startColumnIndex": 0,
-                    "endColumnIndex": 26,
-                },
-                "top": {"style": "SOLID", "color": {"red": 1, "green": 1, "blue": 1}},
-                "bottom": {
-                    "style": "SOLID",
-                    "color": {"red": 1, "green": 1, "blue": 1},
-                },
-                "left": {"style": "SOLID", "color": {"red": 1, "green": 1, "blue": 1}},
-                "right": {"style": "SOLID", "color": {"red": 1, "green": 1, "blue": 1}},
-                "innerHorizontal": {
-                    "style": "SOLID",
-                    "color": {"red": 1, "green": 1, "blue": 1},
-                },
-                "innerVertical": {
-                    "style": "SOLID",
-                    "color": {"red": 1, "green": 1, "blue": 1},
+                    "endColumnIndex": num_columns,
                 },
+                **self._get_borders(WHITE),
             }
         }
 
-    def _get_font_request(self, sheet_id):
+    def _get_font_request(self, sheet_id, num_rows, num_columns):
         return {
             "repeatCell": {
                 "range": {
                     "sheetId": sheet_id,
                     "startRowIndex": 0,
-                    "endRowIndex": 1000,
+                    "endRowIndex": num_rows + 1,
                     "startColumnIndex": 0,
-                    "endColumnIndex": 26,
+                    "endColumnIndex": num_columns,
                 },
                 "cell": {
-                    "userEnteredFormat": {"textFormat": {"fontFamily": "Montserrat"}}
+                    "userEnteredFormat": {"textFormat": {"fontFamily": FONT_FAMILY}}
                 },
                 "fields": "userEnteredFormat.textFormat.fontFamily",
             }
@@ -120,8 +398,8 @@ class GoogleSheetABTest:
                         "backgroundColor": self.header_border_color,
                         "horizontalAlignment": "CENTER",
                         "textFormat": {
-                            "foregroundColor": {"red": 1.0, "green": 1.0, "blue": 1.0},
-                            "fontFamily": "Montserrat",
+                            "foregroundColor": WHITE,
+                            "fontFamily": FONT_FAMILY,
                             "bold": True,
                         },
                     }
@@ -130,32 +408,23 @@ class GoogleSheetABTest:
             }
         }
 
-    def _get_header_values_request(self, sheet_id):
+    def _get_header_values_request(self, sheet_id, layout):
+        # Text and alignment come from the header formatting of the whole row
         return {
             "repeatCell": {
                 "range": {
                     "sheetId": sheet_id,
                     "startRowIndex": 0,
                     "endRowIndex": 1,
-                    "startColumnIndex": 6,
-                    "endColumnIndex": 15,
+                    "startColumnIndex": layout["values"],
+                    "endColumnIndex": layout["end"],
                 },
-                "cell": {
-                    "userEnteredFormat": {
-                        "backgroundColor": {"red": 0.0, "green": 0.627, "blue": 0.51},
-                        "textFormat": {
-                            "foregroundColor": {"red": 1.0, "green": 1.0, "blue": 1.0},
-                            "fontFamily": "Montserrat",
-                            "bold": True,
-                        },
-                        "horizontalAlignment": "CENTER",
-                    }
-                },
-                "fields": "userEnteredFormat(backgroundColor,textFormat,horizontalAlignment)",
+                "cell": {"userEnteredFormat": {"backgroundColor": VALUES_HEADER_COLOR}},
+                "fields": "userEnteredFormat.backgroundColor",
             }
         }
 
-    def _get_header_borders_request(self, sheet_id, color):
+    def _get_header_borders_request(self, sheet_id, color, num_columns):
         return {
             "updateBorders": {
                 "range": {
@@ -163,84 +432,67 @@ class GoogleSheetABTest:
                     "startRowIndex": 0,
                     "endRowIndex": 1,
                     "startColumnIndex": 0,
-                    "endColumnIndex": 26,
+                    "endColumnIndex": num_columns,
                 },
-                "top": {"style": "SOLID", "color": color},
-                "bottom": {"style": "SOLID", "color": color},
-                "left": {"style": "SOLID", "color": color},
-                "right": {"style": "SOLID", "color": color},
-                "innerHorizontal": {"style": "SOLID", "color": color},
-                "innerVertical": {"style": "SOLID", "color": color},
+                **self._get_borders(color),
             }
         }
 
-    def _get_header_values_borders_request(self, sheet_id):
+    def _get_header_values_borders_request(self, sheet_id, layout):
         return {
             "updateBorders": {
                 "range": {
                     "sheetId": sheet_id,
                     "startRowIndex": 0,
                     "endRowIndex": 1,
-                    "startColumnIndex": 6,
-                    "endColumnIndex": 15,
-                },
-                "top": {
-                    "style": "SOLID",
-                    "width": 1,
-                    "color": {"red": 0.0, "green": 0.627, "blue": 0.51},
-                },
-                "bottom": {
-                    "style": "SOLID",
-                    "width": 1,
-                    "color": {"red": 0.0, "green": 0.627, "blue": 0.51},
-                },
-                "left": {
-                    "style": "SOLID",
-                    "width": 1,
-                    "color": {"red": 0.0, "green": 0.627, "blue": 0.51},
-                },
-                "right": {
-                    "style": "SOLID",
-                    "width": 1,
-                    "color": {"red": 0.0, "green": 0.627, "blue": 0.51},
-                },
-                "innerHorizontal": {
-                    "style": "SOLID",
-                    "width": 1,
-                    "color": {"red": 0.0, "green": 0.627, "blue": 0.51},
-                },
-                "innerVertical": {
-                    "style": "SOLID",
-                    "width": 1,
-                    "color": {"red": 0.0, "green": 0.627, "blue": 0.51},
+                    "startColumnIndex": layout["values"],
+                    "endColumnIndex": layout["end"],
                 },
+                **self._get_borders(VALUES_HEADER_COLOR),
             }
         }
 
-    def _get_row_alternating_colors(self, sheet_id, num_rows):
-        requests = []
-        for i in range(num_rows):
-            color = (
-                {"red": 0.95, "green": 0.95, "blue": 0.95}
-                if i % 2 == 0
-                else {"red": 1, "green": 1, "blue": 1}
-            )
-            requests.append(
-                {
-                    "repeatCell": {
+    def _get_row_alternating_colors(self, sheet_id, num_rows, num_columns):
+        """Alternates the body row colors with a single native banding."""
+        return [
+            {
+                "addBanding": {
+                    "bandedRange": {
                         "range": {
                             "sheetId": sheet_id,
-                            "startRowIndex": i + 1,
-                            "endRowIndex": i + 2,
+                            "startRowIndex": 1,
+                            "endRowIndex": num_rows + 1,
+                            "startColumnIndex": 0,
+                            "endColumnIndex": num_columns,
+                        },
+                        "rowProperties": {
+                            "firstBandColor": BAND_COLOR,
+                            "secondBandColor": WHITE,
                         },
-                        "cell": {"userEnteredFormat": {"backgroundColor": color}},
-                        "fields": "userEnteredFormat.backgroundColor",
                     }
                 }
-            )
-        return requests
+            }
+        ]
 
-    def _get_conditional_formatting_requests(self, sheet_id):
+    def _get_boolean_condition(self, condition, layout):
+        """Translates a ConditionalRule condition to a Sheets BooleanCondition."""
+        p_value = column_letter(layout["p_value"])
+        alpha = column_letter(layout["alpha"])
+        if condition == "positive":
+            return {"type": "NUMBER_GREATER", "values": [{"userEnteredValue": "0"}]}
+        if condition == "negative":
+            return {"type": "NUMBER_LESS", "values": [{"userEnteredValue": "0"}]}
+        formula = {
+            "borderline": f"=AND({p_value}2>={alpha}2, {p_value}2<=(2*{alpha}2))",
+            "significant": f"={p_value}2<{alpha}2",
+            "not_significant": f"={p_value}2>(2*{alpha}2)",
+        }[condition]
+        return {"type": "CUSTOM_FORMULA", "values": [{"userEnteredValue": formula}]}
+
+    def _get_conditional_formatting_requests(self, sheet_id, layout):
+        rules = get_conditional_rules(
+            layout, self.positive_back, self.negative_back, self.mid_back
+        )
         return [
             {
                 "addConditionalFormatRule": {
@@ -249,123 +501,33 @@ class GoogleSheetABTest:
                             {
                                 "sheetId": sheet_id,
                                 "startRowIndex": 1,
-                                "startColumnIndex": 9,
-                                "endColumnIndex": 15,
+                                "startColumnIndex": rule.start,
+                                "endColumnIndex": rule.end,
                             }
                         ],
                         "booleanRule": {
-                            "condition": {
-                                "type": "NUMBER_GREATER",
-                                "values": [{"userEnteredValue": "0"}],
-                            },
-                            "format": {"backgroundColor": self.positive_back},
+                            "condition": self._get_boolean_condition(
+                                rule.condition, layout
+                            ),
+                            "format": {"backgroundColor": rule.color},
                         },
                     },
-                    "index": 0,
+                    "index": index,
                 }
-            },
-            {
-                "addConditionalFormatRule": {
-                    "rule": {
-                        "ranges": [
-                            {
-                                "sheetId": sheet_id,
-                                "startRowIndex": 1,
-                                "startColumnIndex": 9,
-                                "endColumnIndex": 15,
-                            }
-                        ],
-                        "booleanRule": {
-                            "condition": {
-                                "type": "NUMBER_LESS",
-                                "values": [{"userEnteredValue": "0"}],
-                            },
-                            "format": {"backgroundColor": self.negative_back},
-                        },
-                    },
-                    "index": 1,
-                }
-            },
-            {
-                "addConditionalFormatRule": {
-                    "rule": {
-                        "ranges": [
-                            {
-                                "sheetId": sheet_id,
-                                "startRowIndex": 1,
-                                "startColumnIndex": 8,
-                                "endColumnIndex": 9,
-                            }
-                        ],
-                        "booleanRule": {
-                            "condition": {
-                                "type": "CUSTOM_FORMULA",
-                                "values": [
-                                    {"userEnteredValue": "=AND(I2>=F2, I2<=(2*F2))"}
-                                ],
-                            },
-                            "format": {"backgroundColor": self.mid_back},
-                        },
-                    },
-                    "index": 2,
-                }
-            },
-            {
-                "addConditionalFormatRule": {
-                    "rule": {
-                        "ranges": [
-                            {
-                                "sheetId": sheet_id,
-                                "startRowIndex": 1,
-                                "startColumnIndex": 8,
-                                "endColumnIndex": 9,
-                            }
-                        ],
-                        "booleanRule": {
-                            "condition": {
-                                "type": "CUSTOM_FORMULA",
-                                "values": [{"userEnteredValue": "=I2<F2"}],
-                            },
-                            "format": {"backgroundColor": self.positive_back},
-                        },
-                    },
-                    "index": 3,
-                }
-            },
-            {
-                "addConditionalFormatRule": {
-                    "rule": {
-                        "ranges": [
-                            {
-                                "sheetId": sheet_id,
-                                "startRowIndex": 1,
-                                "startColumnIndex": 8,
-                                "endColumnIndex": 9,
-                            }
-                        ],
-                        "booleanRule": {
-                            "condition": {
-                                "type": "CUSTOM_FORMULA",
-                                "values": [{"userEnteredValue": "=I2>(2*F2)"}],
-                            },
-                            "format": {"backgroundColor": self.negative_back},
-                        },
-                    },
-                    "index": 4,
-                }
-            },
+            }
+            for index, rule in enumerate(rules)
         ]
 
-    def _get_alignment_requests(self, sheet_id, num_columns):
+    def _get_alignment_requests(self, sheet_id, num_rows, layout):
         return [
             {
                 "repeatCell": {
                     "range": {
                         "sheetId": sheet_id,
                         "startRowIndex": 0,
-                        "endRowIndex": 1000,
-                        "startColumnIndex": 6,
-                        "endColumnIndex": num_columns,
+                        "endRowIndex": num_rows + 1,
+                        "startColumnIndex": layout["values"],
+                        "endColumnIndex": layout["end"],
                     },
                     "cell": {"userEnteredFormat": {"horizontalAlignment": "CENTER"}},
                     "fields": "userEnteredFormat.horizontalAlignment",
@@ -376,9 +538,9 @@ class GoogleSheetABTest:
                     "range": {
                         "sheetId": sheet_id,
                         "startRowIndex": 0,
-                        "endRowIndex": 1000,
+                        "endRowIndex": num_rows + 1,
                         "startColumnIndex": 0,
-                        "endColumnIndex": 6,
+                        "endColumnIndex": layout["values"],
                     },
                     "cell": {"userEnteredFormat": {"horizontalAlignment": "LEFT"}},
                     "fields": "userEnteredFormat.horizontalAlignment",
@@ -386,180 +548,1454 @@ class GoogleSheetABTest:
             },
         ]
 
-    def _get_number_format_request(self, sheet_id):
+    def _get_number_format_request(self, sheet_id, num_rows, layout):
         return {
             "repeatCell": {
                 "range": {
                     "sheetId": sheet_id,
                     "startRowIndex": 1,
-                    "endRowIndex": 1000,
-                    "startColumnIndex": 6,
-                    "endColumnIndex": 12,
+                    "endRowIndex": num_rows + 1,
+                    "startColumnIndex": layout["values"],
+                    "endColumnIndex": layout["percent"],
                 },
                 "cell": {
                     "userEnteredFormat": {
-                        "numberFormat": {"type": "NUMBER", "pattern": "#,##0.00"},
-                        "horizontalAlignment": "CENTER",
+                        "numberFormat": {"type": "NUMBER", "pattern": NUMBER_FORMAT}
                     }
                 },
-                "fields": "userEnteredFormat(numberFormat,horizontalAlignment)",
+                "fields": "userEnteredFormat.numberFormat",
             }
         }
 
-    def _get_percent_format_request(self, sheet_id):
+    def _get_percent_format_request(self, sheet_id, num_rows, layout):
         return {
             "repeatCell": {
                 "range": {
                     "sheetId": sheet_id,
                     "startRowIndex": 1,
-                    "endRowIndex": 1000,
-                    "startColumnIndex": 12,
-                    "endColumnIndex": 15,
+                    "endRowIndex": num_rows + 1,
+                    "startColumnIndex": layout["percent"],
+                    "endColumnIndex": layout["end"],
                 },
                 "cell": {
                     "userEnteredFormat": {
-                        "numberFormat": {"type": "PERCENT", "pattern": "0.00%"},
-                        "horizontalAlignment": "CENTER",
+                        "numberFormat": {"type": "PERCENT", "pattern": PERCENT_FORMAT}
                     }
                 },
-                "fields": "userEnteredFormat(numberFormat,horizontalAlignment)",
+                "fields": "userEnteredFormat.numberFormat",
             }
         }
 
-    def create_summary_sheet(
-        self, df, experiment_name, variant_mapping: dict | None = None
+    def _get_table_formatting_requests(self, sheet_id, num_rows, layout):
+        """Collects the formatting requests that do not depend on the cell values."""
+        num_columns = layout["end"]
+        all_requests = []
+
+        # Add all formatting requests for the main table
+        all_requests.append(self._get_font_request(sheet_id, num_rows, num_columns))
+        all_requests.append(
+            self._get_white_borders_body_request(sheet_id, num_rows, num_columns)
+        )
+        all_requests.append(
+            self._get_header_borders_request(
+                sheet_id, self.header_border_color, num_columns
+            )
+        )
+        all_requests.append(self._get_header_formatting_request(sheet_id))
+        all_requests.append(self._get_header_values_request(sheet_id, layout))
+        all_requests.append(self._get_header_values_borders_request(sheet_id, layout))
+        all_requests.extend(
+            self._get_row_alternating_colors(sheet_id, num_rows, num_columns)
+        )
+        all_requests.extend(self._get_conditional_formatting_requests(sheet_id, layout))
+        # The number formats rely on the alignment set here for every value column
+        all_requests.extend(self._get_alignment_requests(sheet_id, num_rows, layout))
+        all_requests.append(
+            self._get_number_format_request(sheet_id, num_rows, layout)
+        )
+        all_requests.append(
+            self._get_percent_format_request(sheet_id, num_rows, layout)
+        )
+        return all_requests
+
+    @staticmethod
+    def _iter_range_paths(node, path=()):
+        """Yields the key path to every grid range in a request."""
+        if isinstance(node, dict):
+            if "sheetId" in node:
+                yield path
+                return
+            items = node.items()
+        elif isinstance(node, list):
+            items = enumerate(node)
+        else:
+            return
+        for key, value in items:
+            yield from GoogleSheetABTest._iter_range_paths(value, path + (key,))
+
+    def _get_formatting_template(self, columns):
+        """
+        Returns the table formatting requests of a column layout, compiled once per
+        layout and colors, with the grid ranges to fill in.
+        """
+        key = (columns, tuple(tuple(color.items()) for color in self._get_colors()))
+        template = self._formatting_templates.get(key)
+        if template is None:
+            layout = get_column_layout(columns)
+            requests = self._get_table_formatting_requests(0, TEMPLATE_ROWS, layout)
+            # Detached from the color attributes, which may be changed in place
+            requests = json.loads(json.dumps(requests))
+            template = []
+            for request in requests:
+                ranges = []
+                for path in self._iter_range_paths(request):
+                    grid_range = functools.reduce(lambda node, k: node[k], path, request)
+                    sized = grid_range.get("endRowIndex") == TEMPLATE_ROWS + 1
+                    ranges.append((path, sized))
+                template.append((request, ranges))
+            self._formatting_templates[key] = template
+        return template
+
+    @staticmethod
+    def _fill_range(request, path, sized, sheet_id, end_row):
+        """Returns request with the grid range at path filled in, copying only the path."""
+        request = node = request.copy()
+        for key in path:
+            node[key] = node[key].copy()
+            node = node[key]
+        node["sheetId"] = sheet_id
+        if sized:
+            node["endRowIndex"] = end_row
+        return request
+
+    def _get_formatting_requests(self, sheet_id, df_new):
+        """Collects every formatting request for a summary table."""
+        widths = calculate_column_widths(df_new)
+        return self._get_sized_formatting_requests(
+            sheet_id, df_new.columns.tolist(), len(df_new), widths
+        )
+
+    def _get_sized_formatting_requests(self, sheet_id, columns, num_rows, widths):
+        """
+        Collects every formatting request for a table of num_rows rows, besides the
+        header, and the given column widths.
+
+        Everything but the grid ranges is shared with the compiled template, so
+        the requests must not be modified.
+        """
+        end_row = num_rows + 1
+        all_requests = []
+        for request, ranges in self._get_formatting_template(tuple(columns)):
+            for path, sized in ranges:
+                request = self._fill_range(request, path, sized, sheet_id, end_row)
+            all_requests.append(request)
+
+        resize_requests = self._generate_column_width_requests(sheet_id, widths)
+        all_requests.extend(resize_requests)
+
+        return all_requests
+
+    def _get_add_sheet_request(self, experiment_name, df_new, sheet_id=None):
+        properties = {
+            "title": experiment_name,
+            "gridProperties": {
+                # One extra row for the header
+                "rowCount": len(df_new) + 1,
+                "columnCount": df_new.shape[1],
+            },
+        }
+        if sheet_id is not None:
+            properties["sheetId"] = sheet_id
+        return {"addSheet": {"properties": properties}}
+
+    @staticmethod
+    def _get_cell_data(value):
+        """Converts a single value to the CellData shape used by updateCells."""
+        if pd.api.types.is_scalar(value) and pd.isna(value):
+            return {"userEnteredValue": {"stringValue": MISSING_VALUE}}
+        if isinstance(value, (bool, np.bool_)):
+            return {"userEnteredValue": {"boolValue": bool(value)}}
+        if isinstance(value, (int, float, np.integer, np.floating)):
+            return {"userEnteredValue": {"numberValue": float(value)}}
+        return {"userEnteredValue": {"stringValue": str(value)}}
+
+    def _get_cell_data_column(self, series):
+        """Converts a column to CellData, dispatching on its dtype rather than per cell."""
+        missing_cell = {"userEnteredValue": {"stringValue": MISSING_VALUE}}
+        # isna also catches pd.NA and NaT, of nullable and converted dtypes
+        missing = series.isna().to_numpy()
+        if series.dtype.kind in "iuf":
+            return [
+                missing_cell if is_missing else {"userEnteredValue": {"numberValue": v}}
+                for v, is_missing in zip(series.tolist(), missing)
+            ]
+        return [
+            missing_cell if is_missing else self._get_cell_data(v)
+            for v, is_missing in zip(series.tolist(), missing)
+        ]
+
+    def _build_rows(self, chunk, as_cells):
+        """Builds API rows column by column, without an object-dtype copy of the chunk."""
+        if as_cells:
+            columns = [self._get_cell_data_column(chunk[col]) for col in chunk.columns]
+            return [{"values": list(row)} for row in zip(*columns)]
+        columns = [get_display_values(chunk[col]) for col in chunk.columns]
+        return [list(row) for row in zip(*columns)]
+
+    def _get_rows_per_chunk(self, df_new, as_cells, max_bytes, sample_size=100):
+        """Estimates how many rows fit in max_bytes from a sample of serialized rows."""
+        sample = self._build_rows(df_new.iloc[:sample_size], as_cells)
+        if not sample:
+            return 1
+        sample_bytes = len(json.dumps(sample))
+        # Leave some headroom since the sample may not be representative
+        row_bytes = 1.25 * sample_bytes / len(sample)
+        return max(1, int(max_bytes // row_bytes))
+
+    def _iter_row_chunks(self, df_new, as_cells=False, max_bytes=MAX_REQUEST_BYTES):
+        """
+        Yields (row_index, rows) chunks of the sheet, header included, so that each
+        chunk stays under max_bytes once serialized. Rows are plain values, or
+        CellData rows for updateCells when as_cells is set.
+        """
+        rows_per_chunk = self._get_rows_per_chunk(df_new, as_cells, max_bytes)
+
+        header = df_new.columns.tolist()
+        if as_cells:
+            header = {"values": [self._get_cell_data(col) for col in header]}
+
+        for start in range(0, max(len(df_new), 1), rows_per_chunk):
+            rows = self._build_rows(
+                df_new.iloc[start : start + rows_per_chunk], as_cells
+            )
+            if start == 0:
+                yield 0, [header] + rows
+            else:
+                # Shift by one for the header row
+                yield start + 1, rows
+
+    def _iter_update_cells_requests(self, sheet_id, df_new, max_bytes=MAX_REQUEST_BYTES):
+        for row_index, rows in self._iter_row_chunks(df_new, True, max_bytes):
+            yield {
+                "updateCells": {
+                    "start": {
+                        "sheetId": sheet_id,
+                        "rowIndex": row_index,
+                        "columnIndex": 0,
+                    },
+                    "rows": rows,
+                    "fields": "userEnteredValue",
+                }
+            }
+
+    @staticmethod
+    def _iter_batches(requests, max_bytes=MAX_REQUEST_BYTES):
+        """Groups requests into batchUpdate bodies that stay under max_bytes."""
+        batch = []
+        batch_bytes = 0
+        for request in requests:
+            request_bytes = len(json.dumps(request))
+            if batch and batch_bytes + request_bytes > max_bytes:
+                yield batch
+                batch = []
+                batch_bytes = 0
+            batch.append(request)
+            batch_bytes += request_bytes
+        if batch:
+            yield batch
+
+    @staticmethod
+    def _new_sheet_id():
+        """Picks a sheet id on the client so every request can reference it."""
+        return random.randint(1, 2**31 - 1)
+
+    def _iter_single_batch_requests(self, sheet_id, experiment_name, df_new):
+        yield self._get_add_sheet_request(experiment_name, df_new, sheet_id)
+        yield from self._iter_update_cells_requests(sheet_id, df_new)
+        yield from self._get_formatting_requests(sheet_id, df_new)
+
+    def _prepare_summary_frame(
+        self,
+        df,
+        variant_mapping=None,
+        p_value_adjustment=None,
+        adjustment_groups=None,
+        pruning=None,
     ):
         """
-        Creates and formats a new spreadsheet with the provided data.
+        Selects, derives and renames the columns shown in the summary, and prunes
+        its rows when a Pruning is given.
+
+        df is a pandas DataFrame, a pyarrow Table or RecordBatch, or a polars
+        DataFrame; see ``columnar.get_columns``. Only the displayed columns are
+        read from it, numeric columns keep their dtype and missing values stay
+        NaN; they become "N/A" when rows are built.
+        """
+        data = get_columns(df)
+        relabeled = {
+            "dimension_name": ("__total_dimension", "TOTAL"),
+            "dimension_value": ("total", "TOTAL"),
+        }
+
+        columns = {}
+        for col in COLUMN_HEADERS:
+            if col in DERIVED_COLUMNS:
+                continue
+            if col in relabeled:
+                columns[col] = data.relabel(col, *relabeled[col])
+            elif col == "treatment_variant_name" and variant_mapping:
+                columns[col] = data.replace(col, variant_mapping)
+            else:
+                columns[col] = data.column(col)
+
+        columns["%_lift"], columns["%_ci_lower"], columns["%_ci_upper"] = data.ratios(
+            ["ate", "ate_ci_lower", "ate_ci_upper"], "control_variant_mean"
+        )
+
+        if p_value_adjustment:
+            columns["adjusted_p_value"] = adjust_p_values(
+                columns["p_value"],
+                p_value_adjustment,
+                data.frame(adjustment_groups) if adjustment_groups else None,
+            )
+
+        if pruning:
+            # p-values are adjusted over every test, before pruning
+            traffic = None
+            if "control_variant_n" in data and "treatment_variant_n" in data:
+                traffic = (
+                    data.column("control_variant_n"),
+                    data.column("treatment_variant_n"),
+                )
+            columns = prune_rows(columns, pruning, traffic)
+
+        return pd.DataFrame(
+            {
+                header: columns[col]
+                for col, header in COLUMN_HEADERS.items()
+                if col in columns
+            }
+        )
+
+    def get_payload_stats(self, df, variant_mapping: dict | None = None):
+        """
+        Reports the size of the batchUpdate bodies a DataFrame produces in single-batch mode.
+
+        Returns a dict with the total number of requests, how many of them are
+        formatting requests, the number of batchUpdate calls, and the number of
+        serialized JSON bytes.
+        """
+        df_new = self._prepare_summary_frame(df, variant_mapping)
+        sheet_id = self._new_sheet_id()
+
+        stats = {"requests": 0, "formatting_requests": 0, "batches": 0, "bytes": 0}
+        for batch in self._iter_batches(
+            self._iter_single_batch_requests(sheet_id, "payload", df_new)
+        ):
+            stats["requests"] += len(batch)
+            stats["formatting_requests"] += sum(
+                1 for r in batch if not ("addSheet" in r or "updateCells" in r)
+            )
+            stats["batches"] += 1
+            stats["bytes"] += len(json.dumps({"requests": batch}).encode("utf-8"))
+        return stats
+
+    def _get_recorder(self):
+        """Returns the recorder of the publish running in this context, if instrumented."""
+        return _RECORDER.get()
+
+    def _phase(self, name):
+        recorder = self._get_recorder()
+        return recorder.phase(name) if recorder else contextlib.nullcontext()
+
+    def _count_rows_written(self, num_rows):
+        recorder = self._get_recorder()
+        if recorder:
+            recorder.stats.rows_written += num_rows
+
+    def _call_with_backoff(
+        self,
+        func,
+        quota="write",
+        max_retries=5,
+        method="call",
+        payload=None,
+        retry_statuses=RETRYABLE_STATUSES,
+    ):
+        """
+        Calls func once a token for the given quota is available, retrying with
+        exponential backoff on the errors of retry_statuses (rate limit and server
+        errors by default). When instrumented, each attempt is recorded as a call to
+        method sending payload.
         """
-        experiment_name = experiment_name + f"_{date.today()}"
+        limiter = self.write_limiter if quota == "write" else self.read_limiter
+        recorder = self._get_recorder()
+        for attempt in range(max_retries + 1):
+            if recorder:
+                start = time.perf_counter()
+                limiter.acquire()
+                recorder.throttled(time.perf_counter() - start)
+            else:
+                limiter.acquire()
+
+            start = time.perf_counter()
+            try:
+                result = func()
+            except Exception as e:
+                status = self._get_error_status(e)
+                if recorder:
+                    recorder.api_call(method, time.perf_counter() - start, payload, status)
+                if status not in retry_statuses or attempt == max_retries:
+                    raise
+                delay = min(64, 2**attempt) + random.random()
+                if recorder:
+                    recorder.retry(method, status, delay)
+                time.sleep(delay)
+            else:
+                if recorder:
+                    recorder.api_call(method, time.perf_counter() - start, payload)
+                return result
 
-        df_new = df.copy()
+    @staticmethod
+    def _get_error_status(error):
+        """Returns the HTTP status of a Sheets API error, or None for other exceptions."""
+        from googleapiclient.errors import HttpError
+        from gspread.exceptions import APIError
 
-        df_new.replace([np.inf, -np.inf], np.nan, inplace=True)
+        if isinstance(error, HttpError):
+            return error.resp.status
+        if isinstance(error, APIError):
+            return error.response.status_code
+        return None
 
-        df_new["%_lift"] = df_new.ate / df_new.control_variant_mean.replace(0, np.nan)
-        df_new["%_ci_lower"] = (
-            df_new.ate_ci_lower / df_new.control_variant_mean.replace(0, np.nan)
+    def _execute(
+        self,
+        request,
+        quota="write",
+        method="call",
+        payload=None,
+        retry_statuses=RETRYABLE_STATUSES,
+    ):
+        return self._call_with_backoff(
+            request.execute,
+            quota,
+            method=method,
+            payload=payload,
+            retry_statuses=retry_statuses,
         )
-        df_new["%_ci_upper"] = (
-            df_new.ate_ci_upper / df_new.control_variant_mean.replace(0, np.nan)
+
+    @staticmethod
+    def _get_retry_statuses(requests):
+        """
+        Returns the errors a batchUpdate may be retried on: server errors only when
+        every request is idempotent, since a retried addSheet would fail as existing
+        and a retried appendCells would duplicate its rows.
+        """
+        if all(next(iter(request)) in IDEMPOTENT_REQUESTS for request in requests):
+            return RETRYABLE_STATUSES
+        return RATE_LIMIT_STATUSES
+
+    def _batch_update(self, requests):
+        body = {"requests": requests}
+        return self._execute(
+            self.service.spreadsheets().batchUpdate(
+                spreadsheetId=self.spreadsheet_id, body=body
+            ),
+            method="batchUpdate",
+            payload=body,
+            retry_statuses=self._get_retry_statuses(requests),
         )
 
-        df_new = df_new[
-            [
-                "metric_alias",
-                "treatment_variant_name",
-                "dimension_name",
-                "dimension_value",
-                "analysis_type",
-                "alpha",
-                "control_variant_mean",
-                "treatment_variant_mean",
-                "p_value",
-                "ate",
-                "ate_ci_lower",
-                "ate_ci_upper",
-                "%_lift",
-                "%_ci_lower",
-                "%_ci_upper",
-            ]
-        ]
+    @staticmethod
+    def _get_sheet_title(experiment_name, sheet_title=None):
+        """Returns the tab a publish targets: sheet_title, or today's tab for the experiment."""
+        return sheet_title or experiment_name + f"_{date.today()}"
+
+    @_instrumented
+    def _publish(
+        self,
+        df,
+        experiment_name,
+        variant_mapping=None,
+        single_batch=False,
+        p_value_adjustment=None,
+        adjustment_groups=None,
+        sheet_title=None,
+        force_refresh=False,
+        pruning=None,
+    ):
+        """Publishes a summary sheet and reports the outcome as a PublishResult."""
+        from googleapiclient.errors import HttpError
+
+        cache_name = sheet_title or experiment_name
+        experiment_name = self._get_sheet_title(experiment_name, sheet_title)
+        url = self._url
 
-        if variant_mapping:
-            df_new["treatment_variant_name"] = df_new["treatment_variant_name"].replace(
-                variant_mapping
+        with self._phase("prepare"):
+            df_new = self._prepare_summary_frame(
+                df, variant_mapping, p_value_adjustment, adjustment_groups, pruning
             )
 
-        df_new.rename(
-            columns={
-                "metric_alias": "Metric",
-                "treatment_variant_name": "Treatment",
-                "dimension_name": "Split",
-                "dimension_value": "Split Value",
-                "analysis_type": "Analysis Type",
-                "alpha": "Alpha",
-                "control_variant_mean": "Control Mean",
-                "treatment_variant_mean": "Treatment Mean",
-                "p_value": "P-Value",
-                "ate": "ATE",
-                "ate_ci_lower": "ATE Lower",
-                "ate_ci_upper": "ATE Upper",
-                "%_lift": "%Lift",
-                "%_ci_lower": "%Lift Lower",
-                "%_ci_upper": "%Lift Upper",
-            },
-            inplace=True,
+            cache_key = self._get_cache_key(df_new, cache_name, variant_mapping)
+        cached = self._get_cached_tab(cache_key, force_refresh)
+        if cached:
+            return PublishResult(
+                cached["sheet_title"],
+                status="skipped",
+                sheet_id=cached["sheet_id"],
+                url=url,
+            )
+
+        with self._phase("add_sheet"):
+            if single_batch:
+                sheet_id = self._new_sheet_id()
+                batches = self._iter_batches(
+                    self._iter_single_batch_requests(sheet_id, experiment_name, df_new)
+                )
+                # The first batch holds the addSheet request
+                first_batch = next(batches)
+            else:
+                sheet_id = None
+                first_batch = [self._get_add_sheet_request(experiment_name, df_new)]
+
+            try:
+                response = self._batch_update(first_batch)
+            except HttpError as e:
+                if "already exists" in str(e):
+                    return PublishResult(experiment_name, status="exists", url=url)
+                else:
+                    raise
+
+        if single_batch:
+            with self._phase("write"):
+                for batch in batches:
+                    self._batch_update(batch)
+        else:
+            sheet_info = response["replies"][0]["addSheet"]["properties"]
+            sheet_id = sheet_info["sheetId"]
+            with self._phase("open_worksheet"):
+                worksheet = self._call_with_backoff(
+                    lambda: self.gc.open_by_key(self.spreadsheet_id).worksheet(
+                        experiment_name
+                    ),
+                    quota="read",
+                    method="open_by_key",
+                )
+
+            # Paste the data starting from row 1, in chunks under the request size cap
+            with self._phase("upload_values"):
+                for row_index, rows in self._iter_row_chunks(df_new):
+                    self._call_with_backoff(
+                        lambda: worksheet.update(rows, f"A{row_index + 1}"),
+                        method="values.update",
+                        payload=rows,
+                    )
+
+            with self._phase("format"):
+                self._batch_update(self._get_formatting_requests(sheet_id, df_new))
+
+        self._count_rows_written(len(df_new))
+        self._record_publish(cache_key, experiment_name, sheet_id)
+        return PublishResult(
+            experiment_name, status="created", sheet_id=sheet_id, url=url
         )
-        df_new.loc[df_new["Split"] == "__total_dimension", "Split"] = "TOTAL"
-        df_new.loc[df_new["Split Value"] == "total", "Split Value"] = "TOTAL"
 
-        df_new.fillna("N/A", inplace=True)
+    def _iter_stream_requests(self, sheet_id, title, frames, variant_mapping, totals):
+        """
+        Yields the requests that add a tab and fill it one prepared chunk at a time,
+        then format it once every row is known. The number of rows written is
+        kept in totals.
+        """
+        chunks = (self._prepare_summary_frame(frame, variant_mapping) for frame in frames)
+        first = next(chunks, None)
+        if first is None:
+            columns = [h for c, h in COLUMN_HEADERS.items() if c != "adjusted_p_value"]
+        else:
+            columns = first.columns.tolist()
+            chunks = itertools.chain([first], chunks)
+
+        # The tab starts with the header alone and grows with each appendCells
+        header = pd.DataFrame(columns=columns)
+        yield self._get_add_sheet_request(title, header, sheet_id)
+        yield from self._iter_update_cells_requests(sheet_id, header)
 
-        add_sheet_request = {
-            "requests": [
-                {
-                    "addSheet": {
-                        "properties": {
-                            "title": experiment_name,
-                            "gridProperties": {
-                                "rowCount": len(df_new),
-                                "columnCount": df_new.shape[1],
-                            },
-                        }
+        widths = np.array(calculate_column_widths(header))
+        for chunk in chunks:
+            # Column widths are merged by max over the chunks
+            widths = np.maximum(widths, calculate_column_widths(chunk))
+            rows_per_request = self._get_rows_per_chunk(chunk, True, MAX_REQUEST_BYTES)
+            for start in range(0, len(chunk), rows_per_request):
+                yield {
+                    "appendCells": {
+                        "sheetId": sheet_id,
+                        "rows": self._build_rows(
+                            chunk.iloc[start : start + rows_per_request], True
+                        ),
+                        "fields": "userEnteredValue",
                     }
                 }
-            ]
+            totals["rows"] += len(chunk)
+
+        yield from self._get_sized_formatting_requests(
+            sheet_id, columns, totals["rows"], widths.tolist()
+        )
+
+    @_instrumented
+    def _stream(self, frames, experiment_name, variant_mapping=None, sheet_title=None):
+        """Publishes a summary sheet from result chunks and reports the outcome as a PublishResult."""
+        from googleapiclient.errors import HttpError
+
+        experiment_name = self._get_sheet_title(experiment_name, sheet_title)
+        url = self._url
+
+        sheet_id = self._new_sheet_id()
+        totals = {"rows": 0}
+        batches = self._iter_batches(
+            self._iter_stream_requests(
+                sheet_id, experiment_name, frames, variant_mapping, totals
+            )
+        )
+
+        with self._phase("add_sheet"):
+            try:
+                self._batch_update(next(batches))
+            except HttpError as e:
+                if "already exists" in str(e):
+                    return PublishResult(experiment_name, status="exists", url=url)
+                else:
+                    raise
+
+        with self._phase("write"):
+            for batch in batches:
+                self._batch_update(batch)
+
+        self._count_rows_written(totals["rows"])
+        return PublishResult(
+            experiment_name, status="created", sheet_id=sheet_id, url=url
+        )
+
+    def _get_colors(self):
+        return [
+            self.header_border_color,
+            self.positive_back,
+            self.positive_text,
+            self.negative_back,
+            self.negative_text,
+            self.mid_back,
+            self.mid_text,
+        ]
+
+    def _get_formatting_settings(self):
+        """Returns every setting, besides the data, that changes how a sheet looks."""
+        return {
+            "colors": self._get_colors(),
+            "formats": [NUMBER_FORMAT, PERCENT_FORMAT],
         }
 
+    def _get_cache_key(self, df_new, name, variant_mapping=None):
+        """
+        Hashes a prepared summary with everything else that shapes its tab. name is
+        the experiment name, or the explicit sheet title: not today's dated title,
+        so unchanged results are still recognized on a later day.
+        """
+        if self.cache is None:
+            return None
+
+        digest = hashlib.sha256()
+        digest.update(pd.util.hash_pandas_object(df_new, index=False).to_numpy().tobytes())
+        settings = [
+            self.spreadsheet_id,
+            name,
+            df_new.columns.tolist(),
+            sorted((variant_mapping or {}).items(), key=str),
+            self._get_formatting_settings(),
+        ]
+        digest.update(json.dumps(settings, default=str).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _get_cached_publish(self, cache_key, force_refresh=False):
+        if cache_key is None or force_refresh:
+            return None
+        return self.cache.get(cache_key)
+
+    @staticmethod
+    def _locate_cached_tab(cached, sheet_ids):
+        """
+        Returns a publish read from the cache with the current title of its tab, or
+        None when the tab was deleted since. sheet_ids maps tab titles to ids.
+        """
+        titles = {sheet_id: title for title, sheet_id in sheet_ids.items()}
+        if cached["sheet_id"] not in titles:
+            return None
+        return {**cached, "sheet_title": titles[cached["sheet_id"]]}
+
+    def _get_cached_tab(self, cache_key, force_refresh=False):
+        """Returns the publish recorded under cache_key, if its tab still exists."""
+        cached = self._get_cached_publish(cache_key, force_refresh)
+        if cached is None:
+            return None
+        with self._phase("read"):
+            return self._locate_cached_tab(cached, self._get_sheet_ids())
+
+    def _record_publish(self, cache_key, sheet_title, sheet_id):
+        if cache_key is not None:
+            self.cache.put(cache_key, self.spreadsheet_id, sheet_title, sheet_id)
+
+    @staticmethod
+    def _quote_sheet_title(title):
+        return "'" + title.replace("'", "''") + "'"
+
+    def _read_sheet(self, title):
+        """
+        Reads a tab's id, bandings, conditional formats and entered values in one call.
+        Returns None when the spreadsheet has no tab with this title.
+        """
+        from googleapiclient.errors import HttpError
+
         try:
-            response = (
-                self.service.spreadsheets()
-                .batchUpdate(spreadsheetId=self.spreadsheet_id, body=add_sheet_request)
-                .execute()
+            response = self._execute(
+                self.service.spreadsheets().get(
+                    spreadsheetId=self.spreadsheet_id,
+                    ranges=[self._quote_sheet_title(title)],
+                    includeGridData=True,
+                    fields=SHEET_READ_FIELDS,
+                ),
+                quota="read",
+                method="get",
             )
         except HttpError as e:
-            if "already exists" in str(e):
-                print(f"⚠️  Sheet '{experiment_name}' already exists. Please choose another name.")
-                return
-            else:
-                raise
+            # The range cannot be parsed when the tab does not exist; other bad
+            # requests are real errors
+            if e.resp.status == 400 and "Unable to parse range" in str(e):
+                return None
+            raise
+        return response["sheets"][0]
+
+    @staticmethod
+    def _parse_grid_rows(sheet):
+        """Extracts the entered values of a tab read by _read_sheet, row by row."""
+        rows = []
+        for data in sheet.get("data", []):
+            for row in data.get("rowData", []):
+                values = []
+                for cell in row.get("values", []):
+                    value = cell.get("userEnteredValue", {})
+                    values.append(
+                        value.get(
+                            "numberValue",
+                            value.get("stringValue", value.get("boolValue")),
+                        )
+                    )
+                rows.append(values)
+        return rows
+
+    def _get_diff_requests(self, sheet_id, existing_rows, new_rows):
+        """
+        Compares the rows of a tab with the new rows, both header included, by their
+        key columns. Returns the requests that update the changed cells, delete the
+        removed rows and append the new ones, with counts of each.
+        """
+        num_columns = len(new_rows[0])
+        existing_index = {
+            tuple(row[:KEY_SIZE]): i for i, row in enumerate(existing_rows) if i
+        }
+
+        update_requests = []
+        appended_rows = []
+        changed_cells = 0
+        changed_rows = 0
+        kept = set()
+        for row in new_rows[1:]:
+            row_index = existing_index.get(tuple(row[:KEY_SIZE]))
+            if row_index is None:
+                appended_rows.append(
+                    {"values": [self._get_cell_data(v) for v in row]}
+                )
+                continue
+            kept.add(row_index)
+
+            existing = existing_rows[row_index]
+            existing = existing + [None] * (num_columns - len(existing))
+            changed = [j for j in range(num_columns) if existing[j] != row[j]]
+            changed_cells += len(changed)
+            changed_rows += bool(changed)
+
+            # One request per run of adjacent changed cells
+            runs = []
+            for j in changed:
+                if runs and runs[-1][-1] == j - 1:
+                    runs[-1].append(j)
+                else:
+                    runs.append([j])
+            for run in runs:
+                update_requests.append(
+                    {
+                        "updateCells": {
+                            "start": {
+                                "sheetId": sheet_id,
+                                "rowIndex": row_index,
+                                "columnIndex": run[0],
+                            },
+                            "rows": [
+                                {
+                                    "values": [
+                                        self._get_cell_data(row[j])
+                                        for j in range(run[0], run[-1] + 1)
+                                    ]
+                                }
+                            ],
+                            "fields": "userEnteredValue",
+                        }
+                    }
+                )
+
+        # Delete from the bottom up so earlier row indexes stay valid
+        removed = sorted(set(existing_index.values()) - kept, reverse=True)
+        delete_requests = []
+        for row_index in removed:
+            if delete_requests and delete_requests[-1]["deleteDimension"]["range"][
+                "startIndex"
+            ] == row_index + 1:
+                delete_requests[-1]["deleteDimension"]["range"]["startIndex"] = row_index
+                continue
+            delete_requests.append(
+                {
+                    "deleteDimension": {
+                        "range": {
+                            "sheetId": sheet_id,
+                            "dimension": "ROWS",
+                            "startIndex": row_index,
+                            "endIndex": row_index + 1,
+                        }
+                    }
+                }
+            )
 
-        sheet_info = response["replies"][0]["addSheet"]["properties"]
-        sheet_id = sheet_info["sheetId"]
-        worksheet = self.gc.open_by_key(self.spreadsheet_id).worksheet(experiment_name)
+        append_requests = [
+            {
+                "appendCells": {
+                    "sheetId": sheet_id,
+                    "rows": appended_rows[start : start + APPEND_ROWS],
+                    "fields": "userEnteredValue",
+                }
+            }
+            for start in range(0, len(appended_rows), APPEND_ROWS)
+        ]
 
-        # Paste the data starting from row 1
-        worksheet.update(
-            [df_new.columns.values.tolist()] + df_new.values.tolist(), "A1"
+        counts = {
+            "changed_cells": changed_cells,
+            "changed_rows": changed_rows,
+            "added_rows": len(appended_rows),
+            "removed_rows": len(removed),
+        }
+        return update_requests + delete_requests + append_requests, counts
+
+    def _get_clear_formatting_requests(self, sheet):
+        """Removes the bandings and conditional rules a previous publish added."""
+        sheet_id = sheet["properties"]["sheetId"]
+        requests = [
+            {"deleteBanding": {"bandedRangeId": banding["bandedRangeId"]}}
+            for banding in sheet.get("bandedRanges", [])
+        ]
+        # Each deletion shifts the remaining rules up to index 0
+        requests.extend(
+            {"deleteConditionalFormatRule": {"sheetId": sheet_id, "index": 0}}
+            for _ in sheet.get("conditionalFormats", [])
         )
+        return requests
 
-        # List of formatting requests
-        all_requests = []
+    def _get_replace_requests(self, sheet, df_new):
+        """
+        Clears a tab read by _read_sheet and rewrites it with a prepared summary.
+        The tab keeps its sheet id, so links to its gid stay valid.
+        """
+        properties = sheet["properties"]
+        sheet_id = properties["sheetId"]
+        grid = properties["gridProperties"]
 
-        # Add all formatting requests for the main table
-        all_requests.append(self._get_font_request(sheet_id))
-        all_requests.append(self._get_white_borders_body_request(sheet_id))
-        all_requests.append(
-            self._get_header_borders_request(sheet_id, self.header_border_color)
+        requests = self._get_clear_formatting_requests(sheet)
+        requests.append(
+            {
+                "updateCells": {
+                    "range": {"sheetId": sheet_id},
+                    "fields": "userEnteredValue,userEnteredFormat",
+                }
+            }
+        )
+        # Resize the grid to the table, with one extra row for the header
+        for dimension, size, new_size in (
+            ("ROWS", grid["rowCount"], len(df_new) + 1),
+            ("COLUMNS", grid["columnCount"], df_new.shape[1]),
+        ):
+            if size > new_size:
+                requests.append(
+                    {
+                        "deleteDimension": {
+                            "range": {
+                                "sheetId": sheet_id,
+                                "dimension": dimension,
+                                "startIndex": new_size,
+                                "endIndex": size,
+                            }
+                        }
+                    }
+                )
+            elif size < new_size:
+                requests.append(
+                    {
+                        "appendDimension": {
+                            "sheetId": sheet_id,
+                            "dimension": dimension,
+                            "length": new_size - size,
+                        }
+                    }
+                )
+        requests.extend(self._iter_update_cells_requests(sheet_id, df_new))
+        requests.extend(self._get_formatting_requests(sheet_id, df_new))
+        return requests
+
+    @_instrumented
+    def _update(
+        self,
+        df,
+        experiment_name,
+        variant_mapping=None,
+        p_value_adjustment=None,
+        adjustment_groups=None,
+        sheet_title=None,
+        force_refresh=False,
+        pruning=None,
+    ):
+        """Re-publishes a summary sheet in place and reports the outcome as a PublishResult."""
+        title = self._get_sheet_title(experiment_name, sheet_title)
+        url = self._url
+
+        with self._phase("prepare"):
+            df_new = self._prepare_summary_frame(
+                df, variant_mapping, p_value_adjustment, adjustment_groups, pruning
+            )
+
+            cache_key = self._get_cache_key(
+                df_new, sheet_title or experiment_name, variant_mapping
+            )
+        cached = self._get_cached_tab(cache_key, force_refresh)
+        if cached:
+            return PublishResult(
+                cached["sheet_title"],
+                status="skipped",
+                sheet_id=cached["sheet_id"],
+                url=url,
+            )
+
+        with self._phase("read"):
+            sheet = self._read_sheet(title)
+        if sheet is None:
+            # The cache was already checked above
+            return self._publish(
+                df,
+                experiment_name,
+                variant_mapping,
+                True,
+                p_value_adjustment,
+                adjustment_groups,
+                sheet_title,
+                force_refresh=True,
+                pruning=pruning,
+            )
+
+        with self._phase("diff"):
+            sheet_id = sheet["properties"]["sheetId"]
+            existing_rows = self._parse_grid_rows(sheet)
+            new_rows = [
+                row for _, rows in self._iter_row_chunks(df_new) for row in rows
+            ]
+
+        new_keys = {tuple(row[:KEY_SIZE]) for row in new_rows[1:]}
+        existing_keys = {tuple(row[:KEY_SIZE]) for row in existing_rows[1:]}
+        if (
+            not existing_rows
+            or existing_rows[0] != new_rows[0]
+            or len(new_keys) != len(new_rows) - 1
+            or len(existing_keys) != len(existing_rows) - 1
+        ):
+            # Rows cannot be matched: rewrite the whole tab
+            with self._phase("write"):
+                for batch in self._iter_batches(
+                    self._get_replace_requests(sheet, df_new)
+                ):
+                    self._batch_update(batch)
+            self._count_rows_written(len(df_new))
+            self._record_publish(cache_key, title, sheet_id)
+            return PublishResult(title, status="replaced", sheet_id=sheet_id, url=url)
+
+        with self._phase("diff"):
+            requests, counts = self._get_diff_requests(
+                sheet_id, existing_rows, new_rows
+            )
+            if counts["added_rows"] or counts["removed_rows"]:
+                requests.extend(self._get_clear_formatting_requests(sheet))
+                requests.extend(self._get_formatting_requests(sheet_id, df_new))
+
+        with self._phase("write"):
+            for batch in self._iter_batches(requests):
+                self._batch_update(batch)
+        self._count_rows_written(counts["changed_rows"] + counts["added_rows"])
+
+        self._record_publish(cache_key, title, sheet_id)
+        return PublishResult(
+            title,
+            status="updated" if requests else "unchanged",
+            sheet_id=sheet_id,
+            url=url,
+            changes=counts,
+        )
+
+    def update_summary_sheet(
+        self,
+        df,
+        experiment_name,
+        variant_mapping: dict | None = None,
+        p_value_adjustment: str | None = None,
+        adjustment_groups: list | None = None,
+        sheet_title: str | None = None,
+        force_refresh: bool = False,
+        pruning: Pruning | None = None,
+    ):
+        """
+        Updates an existing summary sheet in place with the provided data.
+
+        The tab (``sheet_title``, by default today's tab for the experiment) is read
+        once and its rows are matched with the new ones by Metric, Treatment, Split
+        and Split Value. Only changed cells are written, removed rows are deleted
+        and new rows are appended at the bottom. Formatting is re-applied only when
+        the number of rows changes. When rows cannot be matched (the columns
+        differ or keys repeat) the tab is cleared and rewritten, keeping its sheet
+        id. A missing tab is created as with ``create_summary_sheet``.
+
+        With a ``cache``, the call is skipped when the same content was already
+        published for the experiment (or ``sheet_title``) to a tab that still
+        exists, unless ``force_refresh`` is set. ``pruning`` works as with
+        ``create_summary_sheet``.
+        """
+        result = self._update(
+            df,
+            experiment_name,
+            variant_mapping,
+            p_value_adjustment,
+            adjustment_groups,
+            sheet_title,
+            force_refresh,
+            pruning,
         )
-        all_requests.append(self._get_header_formatting_request(sheet_id))
-        all_requests.append(self._get_header_values_request(sheet_id))
-        all_requests.append(self._get_header_values_borders_request(sheet_id))
-        all_requests.extend(self._get_row_alternating_colors(sheet_id, len(df_new)))
-        all_requests.extend(self._get_conditional_formatting_requests(sheet_id))
-        all_requests.append(self._get_alignment_requests(sheet_id, df_new.shape[1]))
-        all_requests.append(self._get_number_format_request(sheet_id))
-        all_requests.append(self._get_percent_format_request(sheet_id))
-
-        widths = self._calculate_column_widths(df_new)
-        resize_requests = self._generate_column_width_requests(sheet_id, widths)
-        all_requests.extend(resize_requests)
 
-        self.service.spreadsheets().batchUpdate(
-            spreadsheetId=self.spreadsheet_id, body={"requests": all_requests}
-        ).execute()
+        self._report(result)
+        return result
 
-        print(
-            f"✅ New Sheet '{experiment_name}' added to https://docs.google.com/spreadsheets/d/{self.spreadsheet_id}"
+    def create_summary_sheet(
+        self,
+        df,
+        experiment_name,
+        variant_mapping: dict | None = None,
+        single_batch: bool = False,
+        p_value_adjustment: str | None = None,
+        adjustment_groups: list | None = None,
+        force_refresh: bool = False,
+        pruning: Pruning | None = None,
+    ):
+        """
+        Creates and formats a new spreadsheet with the provided data.
+
+        With ``single_batch=True`` the sheet is created, filled and formatted in a
+        single ``spreadsheets.batchUpdate`` call, using a sheet id chosen locally.
+        Large summaries are split into as many calls as the request size cap needs.
+
+        ``p_value_adjustment`` ("bh", "holm" or "bonferroni") adds an adjusted
+        p-value column, corrected over the whole frame or within each group of
+        ``adjustment_groups`` columns, and the significance colors follow it.
+
+        With a ``cache``, the call is skipped when the same content was already
+        published for the experiment, on any day, to a tab that still exists; the
+        result then names that tab and its sheet id. ``force_refresh`` publishes
+        regardless.
+
+        A ``pruning.Pruning`` bounds the rows of summaries split by high-cardinality
+        dimensions: per metric, treatment and split it keeps the top split values
+        by traffic or |%Lift| and the significant ones, collapses the others into
+        an "Other" row, and can cap the total row count. Ranking by traffic needs
+        ``control_variant_n`` and ``treatment_variant_n`` columns.
+        """
+        result = self._publish(
+            df,
+            experiment_name,
+            variant_mapping,
+            single_batch,
+            p_value_adjustment,
+            adjustment_groups,
+            force_refresh=force_refresh,
+            pruning=pruning,
         )
+
+        self._report(result)
+        return result
+
+    def stream_summary_sheet(
+        self,
+        frames,
+        experiment_name,
+        variant_mapping: dict | None = None,
+        sheet_title: str | None = None,
+    ):
+        """
+        Creates a summary sheet from an iterable of result chunks, such as the
+        batches of ``sources.iter_result_batches``, without holding them all.
+
+        Chunks (pandas, Arrow or polars frames) are prepared and appended one at a
+        time, in batchUpdate calls under the request size cap, and the tab is
+        formatted at the end with column widths merged over every chunk. Memory
+        stays bounded by the chunk and batch sizes. P-value adjustment and pruning
+        need every row at once and are not available here.
+        """
+        result = self._stream(frames, experiment_name, variant_mapping, sheet_title)
+
+        self._report(result)
+        return result
+
+    @staticmethod
+    def _report(result):
+        """Prints the outcome of a publish."""
+        name = result.experiment_name
+        if result.status == "skipped":
+            print(f"✅ Sheet '{name}' unchanged since its last publish.")
+        elif result.status == "exists":
+            print(f"⚠️  Sheet '{name}' already exists. Please choose another name.")
+        elif result.status == "created":
+            print(f"✅ New Sheet '{name}' added to {result.url}")
+        elif result.status == "replaced":
+            print(f"✅ Sheet '{name}' replaced in {result.url}")
+        elif result.status == "updated":
+            print(
+                f"✅ Sheet '{name}' updated in {result.url}: "
+                f"{result.changes['changed_cells']} cells changed, "
+                f"{result.changes['added_rows']} rows added, "
+                f"{result.changes['removed_rows']} rows removed"
+            )
+        elif result.status == "unchanged":
+            print(f"✅ Sheet '{name}' is already up to date.")
+
+    def publish_many(self, experiments, max_workers: int = 4, single_batch: bool = False):
+        """
+        Publishes several summaries concurrently and returns one PublishResult per experiment.
+
+        Each experiment is either a dict of ``create_summary_sheet`` keyword arguments
+        or a ``(df, experiment_name[, variant_mapping])`` tuple. API calls share the
+        read/write token buckets, so throughput grows with ``max_workers`` until the
+        quota is reached. Failures are reported in the results instead of raised.
+        """
+        experiments = self._normalize_experiments(experiments)
+
+        def publish(experiment):
+            try:
+                return self._publish(
+                    **{"single_batch": single_batch, **experiment}
+                )
+            except Exception as e:
+                return self._get_failed_result(experiment, e)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(publish, experiments))
+
+    def _get_failed_result(self, experiment, error):
+        """Reports a publish of publish_many that raised, with its stats if recorded."""
+        return PublishResult(
+            self._get_sheet_title(
+                experiment["experiment_name"], experiment.get("sheet_title")
+            ),
+            status="failed",
+            error=error,
+            stats=getattr(error, "publish_stats", None),
+        )
+
+    @staticmethod
+    def _normalize_experiments(experiments):
+        """Turns (df, experiment_name[, variant_mapping]) tuples into keyword dicts."""
+        return [
+            exp if isinstance(exp, dict) else dict(zip(EXPERIMENT_FIELDS, exp))
+            for exp in experiments
+        ]
+
+    def _get_sheet_ids(self):
+        """Reads the title and id of every tab of the spreadsheet in one call."""
+        response = self._execute(
+            self.service.spreadsheets().get(
+                spreadsheetId=self.spreadsheet_id, fields=SHEET_IDS_FIELDS
+            ),
+            quota="read",
+            method="get",
+        )
+        return self._parse_sheet_ids(response)
+
+    @staticmethod
+    def _parse_sheet_ids(response):
+        """Maps the tab titles of a spreadsheets.get response to their sheet ids."""
+        return {
+            sheet["properties"]["title"]: sheet["properties"]["sheetId"]
+            for sheet in response.get("sheets", [])
+        }
+
+    def _get_index_rows(self, entries):
+        """Builds the CellData rows of the index tab from (title, sheet_id, df_new) entries."""
+        rows = [{"values": [self._get_cell_data(header) for header in INDEX_HEADERS]}]
+        for title, sheet_id, df_new in entries:
+            layout = get_column_layout(df_new.columns)
+            p_value = df_new.iloc[:, layout["p_value"]].to_numpy(dtype=float)
+            alpha = df_new.iloc[:, layout["alpha"]].to_numpy(dtype=float)
+            ate = df_new.iloc[:, layout["effects"]].to_numpy(dtype=float)
+            significant = p_value < alpha
+            link = '=HYPERLINK("#gid={}","{}")'.format(sheet_id, title.replace('"', '""'))
+            rows.append(
+                {
+                    "values": [
+                        {"userEnteredValue": {"formulaValue": link}},
+                        self._get_cell_data(len(df_new)),
+                        self._get_cell_data(int(significant.sum())),
+                        self._get_cell_data(int((significant & (ate > 0)).sum())),
+                        self._get_cell_data(int((significant & (ate < 0)).sum())),
+                    ]
+                }
+            )
+        return rows
+
+    def _get_index_requests(self, sheet_id, title, entries):
+        """Adds, fills and formats the index tab of a workbook, as the first tab."""
+        rows = self._get_index_rows(entries)
+        num_columns = len(INDEX_HEADERS)
+        widths = [max([len(t) for t, _, _ in entries] + [len(INDEX_HEADERS[0])]) + 5]
+        widths += [len(header) + 5 for header in INDEX_HEADERS[1:]]
+        return [
+            {
+                "addSheet": {
+                    "properties": {
+                        "sheetId": sheet_id,
+                        "title": title,
+                        "index": 0,
+                        "gridProperties": {
+                            "rowCount": len(rows),
+                            "columnCount": num_columns,
+                        },
+                    }
+                }
+            },
+            {
+                "updateCells": {
+                    "start": {"sheetId": sheet_id, "rowIndex": 0, "columnIndex": 0},
+                    "rows": rows,
+                    "fields": "userEnteredValue",
+                }
+            },
+            self._get_font_request(sheet_id, len(entries), num_columns),
+            self._get_header_borders_request(
+                sheet_id, self.header_border_color, num_columns
+            ),
+            self._get_header_formatting_request(sheet_id),
+            *self._generate_column_width_requests(sheet_id, widths),
+        ]
+
+    @_instrumented
+    def _publish_workbook(self, experiments, index_name="Index"):
+        """Publishes many summaries, and an optional index tab, in shared batchUpdate calls."""
+        url = self._url
+        with self._phase("read"):
+            sheet_ids = self._get_sheet_ids()
+        existing_titles = set(sheet_ids)
+
+        results = []
+        entries = []
+        cache_keys = []
+        for experiment in self._normalize_experiments(experiments):
+            title = self._get_sheet_title(
+                experiment["experiment_name"], experiment.get("sheet_title")
+            )
+            # Without a cache an existing tab cannot be skipped, so is not prepared
+            if title in existing_titles and self.cache is None:
+                results.append(PublishResult(title, status="exists", url=url))
+                continue
+
+            variant_mapping = experiment.get("variant_mapping")
+            with self._phase("prepare"):
+                df_new = self._prepare_summary_frame(
+                    experiment["df"],
+                    variant_mapping,
+                    experiment.get("p_value_adjustment"),
+                    experiment.get("adjustment_groups"),
+                    experiment.get("pruning"),
+                )
+                cache_key = self._get_cache_key(
+                    df_new,
+                    experiment.get("sheet_title") or experiment["experiment_name"],
+                    variant_mapping,
+                )
+                cached = self._get_cached_publish(
+                    cache_key, experiment.get("force_refresh", False)
+                )
+            # The tabs were read above: a deleted one is published again
+            if cached:
+                cached = self._locate_cached_tab(cached, sheet_ids)
+            if cached:
+                results.append(
+                    PublishResult(
+                        cached["sheet_title"],
+                        status="skipped",
+                        sheet_id=cached["sheet_id"],
+                        url=url,
+                    )
+                )
+                continue
+            # A batch is applied atomically: one existing title would fail them all
+            if title in existing_titles:
+                results.append(PublishResult(title, status="exists", url=url))
+                continue
+            existing_titles.add(title)
+
+            sheet_id = self._new_sheet_id()
+            entries.append((title, sheet_id, df_new))
+            cache_keys.append(cache_key)
+            results.append(
+                PublishResult(title, status="created", sheet_id=sheet_id, url=url)
+            )
+
+        requests = itertools.chain.from_iterable(
+            self._iter_single_batch_requests(sheet_id, title, df_new)
+            for title, sheet_id, df_new in entries
+        )
+        if index_name is not None and entries:
+            index_title = self._get_sheet_title(index_name)
+            if index_title in existing_titles:
+                results.append(PublishResult(index_title, status="exists", url=url))
+            else:
+                index_id = self._new_sheet_id()
+                requests = itertools.chain(
+                    requests, self._get_index_requests(index_id, index_title, entries)
+                )
+                results.append(
+                    PublishResult(
+                        index_title, status="created", sheet_id=index_id, url=url
+                    )
+                )
+
+        with self._phase("write"):
+            for batch in self._iter_batches(requests):
+                self._batch_update(batch)
+
+        self._count_rows_written(sum(len(df_new) for _, _, df_new in entries))
+        for (title, sheet_id, _), cache_key in zip(entries, cache_keys):
+            self._record_publish(cache_key, title, sheet_id)
+        return results
+
+    def create_workbook(self, experiments, index_name: str | None = "Index"):
+        """
+        Creates the tabs of many experiments at once and returns their PublishResults.
+
+        Experiments are given as in ``publish_many``. Every tab is added, filled and
+        formatted in as few ``spreadsheets.batchUpdate`` calls as the request size cap
+        allows, after a single read of the existing tab titles: experiments whose tab
+        already exists are reported as such and left out, and those unchanged since
+        their last publish (with a cache) as skipped. Unless ``index_name`` is
+        None, a first tab (named like the others, with today's date) links to every
+        new tab and counts its significant, positive and negative results; its
+        result comes last.
+        """
+        results = self._publish_workbook(experiments, index_name)
+
+        # New tabs are reported together
+        for result in results:
+            if result.status != "created":
+                self._report(result)
+        created = [r for r in results if r.status == "created"]
+        if created:
+            print(f"✅ {len(created)} new Sheets added to {created[0].url}")
+        return results
+
+    def get_summary_layout(self, df_new):
+        """
+        Returns the backend-neutral layout of a prepared summary: headers, number
+        formats, column widths and significance colors, as a ``layout.SummaryLayout``.
+        """
+        return get_summary_layout(
+            df_new,
+            self.header_border_color,
+            self.positive_back,
+            self.negative_back,
+            self.mid_back,
+        )
+
+    def export_workbook(self, experiments, path, format: str | None = None):
+        """
+        Renders summaries to a local file, without any API call, and returns the
+        names of their worksheets or sections.
+
+        Experiments are given as in ``publish_many``, and each one is prepared as
+        for ``create_summary_sheet`` (``pruning`` included). ``format`` ("xlsx" or
+        "html") is guessed from the extension of ``path`` when omitted. An XLSX file
+        has one worksheet per summary, with live number formats and conditional
+        colors (requires xlsxwriter); an HTML file is one static page with a table
+        per summary. Neither needs credentials: the spreadsheet id and service
+        account file may be None.
+        """
+        from .export import write_html, write_xlsx
+
+        if format is None:
+            format = "html" if str(path).lower().endswith((".html", ".htm")) else "xlsx"
+        if format not in ("xlsx", "html"):
+            raise ValueError(f"Unknown export format '{format}'. Use 'xlsx' or 'html'.")
+
+        tables = []
+        for experiment in self._normalize_experiments(experiments):
+            df_new = self._prepare_summary_frame(
+                experiment["df"],
+                experiment.get("variant_mapping"),
+                experiment.get("p_value_adjustment"),
+                experiment.get("adjustment_groups"),
+                experiment.get("pruning"),
+            )
+            title = self._get_sheet_title(
+                experiment["experiment_name"], experiment.get("sheet_title")
+            )
+            tables.append((title, df_new, self.get_summary_layout(df_new)))
+
+        if format == "xlsx":
+            names = write_xlsx(path, tables)
+        else:
+            write_html(path, tables)
+            names = [title for title, _, _ in tables]
+        print(f"✅ {len(tables)} summaries written to {path}")
+        return names
+
+    def export_summary(
+        self,
+        df,
+        experiment_name,
+        path,
+        variant_mapping: dict | None = None,
+        p_value_adjustment: str | None = None,
+        adjustment_groups: list | None = None,
+        pruning: Pruning | None = None,
+        format: str | None = None,
+    ):
+        """
+        Renders one summary to a local XLSX or HTML file, laid out like its Google
+        Sheets tab; see ``export_workbook``.
+        """
+        return self.export_workbook(
+            [
+                {
+                    "df": df,
+                    "experiment_name": experiment_name,
+                    "variant_mapping": variant_mapping,
+                    "p_value_adjustment": p_value_adjustment,
+                    "adjustment_groups": adjustment_groups,
+                    "pruning": pruning,
+                }
+            ],
+            path,
+            format,
+        )[0]
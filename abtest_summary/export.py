@@ -0,0 +1,253 @@
+import html
+import re
+
+from .layout import (
+    MISSING_VALUE,
+    NUMBER_FORMAT,
+    PERCENT_FORMAT,
+    WHITE,
+    column_letter,
+    get_cell_rules,
+    get_display_values,
+    to_hex,
+)
+
+# Python format spec of each number format pattern
+FORMAT_SPECS = {NUMBER_FORMAT: ",.2f", PERCENT_FORMAT: ".2%"}
+
+# Worksheet names are at most 31 characters, and some characters are reserved
+MAX_WORKSHEET_NAME = 31
+RESERVED_WORKSHEET_CHARS = re.compile(r"[\[\]:*?/\\]")
+
+# Spreadsheet-like formulas of the XLSX conditional formats; numbers only, since
+# Excel ranks text above every number. {cell} is the top-left cell of the range,
+# {p_value} and {alpha} those of its first row.
+XLSX_CONDITIONS = {
+    "positive": "=AND(ISNUMBER({cell}),{cell}>0)",
+    "negative": "=AND(ISNUMBER({cell}),{cell}<0)",
+    "borderline": "=AND(ISNUMBER({p_value}),{p_value}>={alpha},{p_value}<=2*{alpha})",
+    "significant": "=AND(ISNUMBER({p_value}),{p_value}<{alpha})",
+    "not_significant": "=AND(ISNUMBER({p_value}),{p_value}>2*{alpha})",
+}
+
+
+def _get_worksheet_names(titles):
+    """Makes tab titles valid and unique as worksheet names."""
+    names = []
+    used = set()
+    for title in titles:
+        name = RESERVED_WORKSHEET_CHARS.sub("_", title)[:MAX_WORKSHEET_NAME]
+        suffix = 1
+        # Worksheet names are case-insensitive
+        while name.lower() in used:
+            suffix += 1
+            tail = f"~{suffix}"
+            name = name[: MAX_WORKSHEET_NAME - len(tail)] + tail
+        used.add(name.lower())
+        names.append(name)
+    return names
+
+
+def _cell_name(row, column):
+    """Converts zero-based indexes to an A1 cell name."""
+    return f"{column_letter(column)}{row + 1}"
+
+
+def write_xlsx(path, tables):
+    """
+    Writes summaries to an XLSX workbook, one worksheet per (title, df_new, layout)
+    table, and returns the worksheet names (titles made valid and unique).
+
+    Cells keep their numbers, with the layout's number formats, and the
+    significance colors are native conditional formats. path is a file name or a
+    writable binary file object. Requires xlsxwriter.
+    """
+    try:
+        import xlsxwriter
+    except ImportError as e:
+        raise ImportError("Exporting to XLSX requires xlsxwriter.") from e
+
+    names = _get_worksheet_names([title for title, _, _ in tables])
+    workbook = xlsxwriter.Workbook(
+        path,
+        {
+            # Values are data, never formulas or links
+            "strings_to_formulas": False,
+            "strings_to_urls": False,
+            "in_memory": not isinstance(path, str),
+        },
+    )
+    formats = {}
+
+    def get_format(**properties):
+        # Formats are shared across worksheets: a workbook holds each one once
+        key = tuple(sorted(properties.items()))
+        if key not in formats:
+            formats[key] = workbook.add_format(properties)
+        return formats[key]
+
+    try:
+        for name, (_, df_new, layout) in zip(names, tables):
+            worksheet = workbook.add_worksheet(name)
+            columns = layout.columns
+            font = {"font_name": layout.font_family, "border": 1}
+            num_rows = len(df_new)
+
+            for i, header in enumerate(layout.headers):
+                color = (
+                    layout.values_header_color
+                    if i >= columns["values"]
+                    else layout.header_color
+                )
+                worksheet.write_string(
+                    0,
+                    i,
+                    header,
+                    get_format(
+                        bold=True,
+                        align="center",
+                        font_color=to_hex(WHITE),
+                        bg_color=to_hex(color),
+                        border_color=to_hex(color),
+                        **font,
+                    ),
+                )
+
+            for i, pattern in enumerate(layout.formats):
+                cell_format = get_format(
+                    align="center" if i >= columns["values"] else "left",
+                    border_color=to_hex(WHITE),
+                    **({"num_format": pattern} if pattern else {}),
+                    **font,
+                )
+                worksheet.set_column(i, i, layout.widths[i])
+                worksheet.write_column(
+                    1, i, get_display_values(df_new.iloc[:, i]), cell_format
+                )
+
+            if not num_rows:
+                continue
+            last_row = num_rows
+            for rule in layout.rules:
+                formula = XLSX_CONDITIONS[rule.condition].format(
+                    cell=_cell_name(1, rule.start),
+                    p_value="$" + _cell_name(1, columns["p_value"]),
+                    alpha="$" + _cell_name(1, columns["alpha"]),
+                )
+                worksheet.conditional_format(
+                    1,
+                    rule.start,
+                    last_row,
+                    rule.end - 1,
+                    {
+                        "type": "formula",
+                        "criteria": formula,
+                        "format": get_format(bg_color=to_hex(rule.color)),
+                    },
+                )
+            # Banding comes last, so the significance colors take precedence
+            worksheet.conditional_format(
+                1,
+                0,
+                last_row,
+                columns["end"] - 1,
+                {
+                    "type": "formula",
+                    "criteria": "=MOD(ROW(),2)=0",
+                    "format": get_format(bg_color=to_hex(layout.band_color)),
+                },
+            )
+    finally:
+        workbook.close()
+    return names
+
+
+def _format_column(series, pattern):
+    """Formats a column as displayed text, with missing values as MISSING_VALUE."""
+    values = get_display_values(series)
+    spec = FORMAT_SPECS.get(pattern)
+    if spec is None:
+        return [html.escape(str(value)) for value in values]
+    return [
+        MISSING_VALUE if isinstance(value, str) else format(value, spec)
+        for value in values
+    ]
+
+
+def _render_table(title, df_new, layout):
+    columns = layout.columns
+    parts = [f"<h2>{html.escape(title)}</h2>", '<table class="abtest-summary">']
+    parts.append("<colgroup>")
+    parts.extend(f'<col style="width:{width}ch">' for width in layout.widths)
+    parts.append("</colgroup>")
+
+    parts.append("<thead><tr>")
+    for i, header in enumerate(layout.headers):
+        if i >= columns["values"]:
+            color = layout.values_header_color
+        else:
+            color = layout.header_color
+        parts.append(
+            f'<th style="background:{to_hex(color)};border-color:{to_hex(color)}">'
+            f"{html.escape(header)}</th>"
+        )
+    parts.append("</tr></thead><tbody>")
+
+    # Cells are built column by column, then joined into rows
+    cell_rules = get_cell_rules(df_new, layout)
+    rule_styles = [f' style="background:{to_hex(rule.color)}"' for rule in layout.rules]
+    cells = []
+    for i, pattern in enumerate(layout.formats):
+        texts = _format_column(df_new.iloc[:, i], pattern)
+        if i < columns["values"]:
+            cells.append(["<td>" + text + "</td>" for text in texts])
+            continue
+        openings = ['<td class="value"' + style + ">" for style in rule_styles]
+        # Index -1, no rule, picks the opening without a style
+        openings.append('<td class="value">')
+        if i in cell_rules:
+            indexes = cell_rules[i].tolist()
+        else:
+            indexes = [-1] * len(texts)
+        cells.append(
+            [openings[index] + text + "</td>" for text, index in zip(texts, indexes)]
+        )
+    parts.extend("<tr>" + "".join(row) + "</tr>" for row in zip(*cells))
+    parts.append("</tbody></table>")
+    return "\n".join(parts)
+
+
+def render_html(tables, title="A/B test summaries"):
+    """
+    Renders summaries as one static HTML page, a table per (title, df_new, layout)
+    table, styled like their Google Sheets tabs. Numbers are shown formatted.
+    """
+    if not tables:
+        return f"<!DOCTYPE html><title>{html.escape(title)}</title>"
+    layout = tables[0][2]
+    style = "\n".join(
+        [
+            "body { font-family: %s, sans-serif; }" % layout.font_family,
+            "table.abtest-summary { border-collapse: collapse; table-layout: fixed;"
+            " margin-bottom: 2em; }",
+            "table.abtest-summary th { color: %s; font-weight: bold;"
+            " text-align: center; border: 1px solid; }" % to_hex(WHITE),
+            "table.abtest-summary td { border: 1px solid %s; text-align: left;"
+            " white-space: nowrap; overflow: hidden; }" % to_hex(WHITE),
+            "table.abtest-summary td.value { text-align: center; }",
+            "table.abtest-summary tbody tr:nth-child(odd) { background: %s; }"
+            % to_hex(layout.band_color),
+        ]
+    )
+    body = "\n".join(_render_table(*table) for table in tables)
+    return (
+        '<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n'
+        f"<title>{html.escape(title)}</title>\n<style>\n{style}\n</style>\n</head>\n"
+        f"<body>\n{body}\n</body>\n</html>\n"
+    )
+
+
+def write_html(path, tables, title="A/B test summaries"):
+    """Writes the page of ``render_html`` to path."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(render_html(tables, title))
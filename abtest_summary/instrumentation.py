@@ -0,0 +1,85 @@
+import contextlib
+import json
+import time
+from dataclasses import dataclass, field
+
+
+@dataclass
+class PublishStats:
+    """Where the time and traffic of one publish went."""
+
+    # Wall time of each phase, in seconds and in the order they ran
+    phases: dict = field(default_factory=dict)
+    api_calls: int = 0
+    retries: int = 0
+    payload_bytes: int = 0
+    rows_written: int = 0
+    # Time spent waiting for the read/write quota
+    throttled_seconds: float = 0.0
+
+
+@dataclass
+class PublishEvent:
+    """
+    One step of a publish, as passed to the ``on_event`` hook of GoogleSheetABTest.
+
+    ``kind`` is ``"phase"`` (``name`` is the phase), ``"api_call"`` or ``"retry"``
+    (``name`` is the API method, ``status`` the HTTP error status if any), or
+    ``"publish"`` once it is over (``name`` is the PublishResult status).
+    """
+
+    experiment_name: str
+    kind: str
+    name: str
+    seconds: float = 0.0
+    payload_bytes: int = 0
+    status: int | None = None
+
+
+class Recorder:
+    """Collects the stats of one publish and forwards its events to a hook."""
+
+    def __init__(self, experiment_name, on_event=None):
+
+        self.experiment_name = experiment_name
+        self.on_event = on_event
+        self.stats = PublishStats()
+
+    def _emit(self, kind, name, seconds=0.0, payload_bytes=0, status=None):
+        if self.on_event is not None:
+            self.on_event(
+                PublishEvent(
+                    self.experiment_name, kind, name, seconds, payload_bytes, status
+                )
+            )
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.stats.phases[name] = self.stats.phases.get(name, 0.0) + seconds
+            self._emit("phase", name, seconds)
+
+    def api_call(self, method, seconds, payload=None, status=None, payload_bytes=None):
+        """
+        Records one attempt of an API call. Unless its size is given, the payload is
+        measured as serialized JSON.
+        """
+        if payload_bytes is None:
+            payload_bytes = len(json.dumps(payload)) if payload is not None else 0
+        self.stats.api_calls += 1
+        self.stats.payload_bytes += payload_bytes
+        self._emit("api_call", method, seconds, payload_bytes, status)
+
+    def retry(self, method, status, seconds):
+        self.stats.retries += 1
+        self._emit("retry", method, seconds, status=status)
+
+    def throttled(self, seconds):
+        self.stats.throttled_seconds += seconds
+
+    def finish(self, status, seconds):
+        self._emit("publish", status, seconds)
@@ -0,0 +1,242 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# Number formats of the value and percentage columns
+NUMBER_FORMAT = "#,##0.00"
+PERCENT_FORMAT = "0.00%"
+
+# Shown in place of missing or undefined values
+MISSING_VALUE = "N/A"
+
+# Fixed colors of the table; the configurable ones belong to the publisher
+WHITE = {"red": 1.0, "green": 1.0, "blue": 1.0}
+BAND_COLOR = {"red": 0.95, "green": 0.95, "blue": 0.95}
+VALUES_HEADER_COLOR = {"red": 0.0, "green": 0.627, "blue": 0.51}
+
+FONT_FAMILY = "Montserrat"
+
+# Conditions a ConditionalRule can test, on the sign of a cell or on the p-value
+# of its row compared with its alpha
+CONDITIONS = ("positive", "negative", "borderline", "significant", "not_significant")
+
+
+@dataclass
+class ConditionalRule:
+    """
+    Colors the background of the body cells of columns ``start`` to ``end``
+    (excluded) where ``condition``, one of CONDITIONS, holds. Only numbers match:
+    missing values are never colored.
+    """
+
+    start: int
+    end: int
+    condition: str
+    color: dict
+
+
+@dataclass
+class SummaryLayout:
+    """
+    How a prepared summary is laid out and styled, whatever renders it: Google
+    Sheets formatting requests, an XLSX workbook or an HTML page.
+    """
+
+    headers: list
+    # Column index of each group, see get_column_layout
+    columns: dict
+    # Number format pattern of each column, None for text
+    formats: list
+    # In characters, header and padding included
+    widths: list
+    # In priority order: the first rule that holds colors the cell
+    rules: list
+    header_color: dict
+    values_header_color: dict
+    band_color: dict
+    font_family: str = FONT_FAMILY
+
+
+def get_column_layout(columns):
+    """Locates the column groups the formatting applies to."""
+    columns = list(columns)
+    if "Adj. P-Value" in columns:
+        p_value = columns.index("Adj. P-Value")
+    else:
+        p_value = columns.index("P-Value")
+    return {
+        "details": columns.index("Analysis Type"),
+        "alpha": columns.index("Alpha"),
+        "values": columns.index("Control Mean"),
+        "p_value": p_value,
+        "effects": columns.index("ATE"),
+        "percent": columns.index("%Lift"),
+        "end": len(columns),
+    }
+
+
+def column_letter(index):
+    """Converts a zero-based column index to its A1 letter."""
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def get_column_formats(columns):
+    """Returns the number format pattern applied to each column, if any."""
+    layout = get_column_layout(columns)
+    return [
+        PERCENT_FORMAT
+        if i >= layout["percent"]
+        else NUMBER_FORMAT if i >= layout["values"] else None
+        for i in range(layout["end"])
+    ]
+
+
+def estimate_display_width(series, pattern=None):
+    """Estimates the widest value of a column as displayed with pattern."""
+    # Text cells (and numbers without a known format) are measured on the
+    # distinct values only, which is exact and cheap for repetitive columns
+    missing = series.isna()
+    if pattern is None:
+        texts = series[~missing].unique()
+    else:
+        numbers = pd.to_numeric(series, errors="coerce").to_numpy(dtype=float)
+        is_number = ~np.isnan(numbers)
+        texts = series[~(is_number | missing)].unique()
+    max_len = pd.Series(texts, dtype=object).astype(str).str.len().max()
+    max_len = 0 if pd.isna(max_len) else int(max_len)
+    if missing.any():
+        max_len = max(max_len, len(MISSING_VALUE))
+
+    if pattern is None or not is_number.any():
+        return max_len
+
+    numbers = numbers[is_number]
+    if pattern == PERCENT_FORMAT:
+        numbers = numbers * 100
+    rounded = np.round(np.abs(numbers), 2)
+    int_digits = np.floor(np.log10(np.maximum(rounded, 1))).astype(int) + 1
+    widths = int_digits + 3 + (numbers < 0)
+    if pattern == PERCENT_FORMAT:
+        widths += 1
+    else:
+        # Thousands separators
+        widths += (int_digits - 1) // 3
+    return max(max_len, int(widths.max()))
+
+
+def calculate_column_widths(df, header_only_cols=None, padding=5):
+    """Calculates optimal column widths based on content."""
+    if header_only_cols is None:
+        # Only the key columns are sized on their values
+        layout = get_column_layout(df.columns)
+        header_only_cols = range(layout["details"], layout["end"])
+
+    formats = get_column_formats(df.columns)
+    widths = []
+    for i, col in enumerate(df.columns):
+        if i in header_only_cols:
+            max_len = len(str(col))
+        else:
+            max_len = max(len(str(col)), estimate_display_width(df[col], formats[i]))
+        widths.append(max_len + padding)
+    return widths
+
+
+def get_conditional_rules(layout, positive_color, negative_color, mid_color):
+    """
+    Returns the significance colors of a column layout: effects by their sign, and
+    the p-value by how it compares with alpha.
+    """
+    effects = (layout["effects"], layout["end"])
+    p_value = (layout["p_value"], layout["p_value"] + 1)
+    return [
+        ConditionalRule(*effects, "positive", positive_color),
+        ConditionalRule(*effects, "negative", negative_color),
+        ConditionalRule(*p_value, "borderline", mid_color),
+        ConditionalRule(*p_value, "significant", positive_color),
+        ConditionalRule(*p_value, "not_significant", negative_color),
+    ]
+
+
+def get_summary_layout(df_new, header_color, positive_color, negative_color, mid_color):
+    """Builds the SummaryLayout of a prepared summary frame."""
+    layout = get_column_layout(df_new.columns)
+    return SummaryLayout(
+        headers=df_new.columns.tolist(),
+        columns=layout,
+        formats=get_column_formats(df_new.columns),
+        widths=calculate_column_widths(df_new),
+        rules=get_conditional_rules(layout, positive_color, negative_color, mid_color),
+        header_color=header_color,
+        values_header_color=VALUES_HEADER_COLOR,
+        band_color=BAND_COLOR,
+    )
+
+
+def get_display_values(series):
+    """Converts a column to plain values, with missing ones as MISSING_VALUE."""
+    values = series.tolist()
+    if series.dtype.kind in "iuf":
+        missing = np.isnan(series.to_numpy(dtype=float))
+    else:
+        missing = series.isna().to_numpy()
+    if missing.any():
+        for i in np.flatnonzero(missing).tolist():
+            values[i] = MISSING_VALUE
+    return values
+
+
+def _evaluate_condition(condition, values, alpha):
+    """Tells where a condition holds, given a column and the alpha of each row."""
+    if condition == "positive":
+        return values > 0
+    if condition == "negative":
+        return values < 0
+    if condition == "significant":
+        return values < alpha
+    if condition == "borderline":
+        return (values >= alpha) & (values <= 2 * alpha)
+    if condition == "not_significant":
+        return values > 2 * alpha
+    raise ValueError(f"Unknown condition '{condition}'. Use one of {CONDITIONS}.")
+
+
+def get_cell_rules(df, summary_layout):
+    """
+    Evaluates the conditional rules of a layout on a prepared summary. Returns,
+    for each column with rules, an array holding for each body cell the index of
+    the rule that colors it, or -1.
+    """
+    numbers = {}
+
+    def get_numbers(i):
+        # Every column is converted once, however many rules read it
+        if i not in numbers:
+            numbers[i] = pd.to_numeric(df.iloc[:, i], errors="coerce").to_numpy(
+                dtype=float
+            )
+        return numbers[i]
+
+    alpha = get_numbers(summary_layout.columns["alpha"])
+    cell_rules = {}
+    # Lowest priority first, so the first rule that holds is written last
+    for index in reversed(range(len(summary_layout.rules))):
+        rule = summary_layout.rules[index]
+        for i in range(rule.start, rule.end):
+            holds = _evaluate_condition(rule.condition, get_numbers(i), alpha)
+            cell_rules.setdefault(i, np.full(len(df), -1))[holds] = index
+    return cell_rules
+
+
+def to_hex(color):
+    """Converts a Sheets API color to #rrggbb."""
+    return "#" + "".join(
+        f"{round(color.get(channel, 0.0) * 255):02x}"
+        for channel in ("red", "green", "blue")
+    )
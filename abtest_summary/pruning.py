@@ -0,0 +1,194 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# Columns identifying the group of split values a row is ranked in
+GROUP_COLUMNS = ["metric_alias", "treatment_variant_name", "dimension_name"]
+
+# Split name of the rows that are never pruned, once relabeled
+TOTAL_DIMENSION = "TOTAL"
+
+
+@dataclass
+class Pruning:
+    """
+    How many rows a summary split by high-cardinality dimensions keeps.
+
+    Within each metric, treatment and split, the ``top_k`` split values by
+    ``"traffic"`` (control plus treatment sample size) or ``"lift"`` (absolute
+    %Lift) are kept, plus every significant one unless ``keep_significant`` is
+    False. The others collapse into one ``other_label`` row per metric, treatment
+    and split, unless only one is left out: it is then kept. TOTAL rows are always
+    kept. ``max_rows`` then caps the rows of the whole summary, Other rows
+    included, by dropping the lowest ranked split values of every group first.
+    """
+
+    top_k: int = 10
+    by: str = "traffic"
+    keep_significant: bool = True
+    max_rows: int | None = None
+    other_label: str = "Other"
+
+    def __post_init__(self):
+        if self.by not in ("traffic", "lift"):
+            raise ValueError(
+                f"Unknown pruning order '{self.by}'. Use 'traffic' or 'lift'."
+            )
+
+
+def _group_sums(codes, values, num_groups):
+    """Sums values per group code, NaN values left out."""
+    return np.bincount(codes, weights=np.nan_to_num(values), minlength=num_groups)
+
+
+def _get_other_rows(columns, dropped, codes, num_groups, label, traffic):
+    """
+    Builds one row per group from its dropped rows. Means are pooled, weighted by
+    sample size, when traffic is known; intervals and p-values are left missing.
+    """
+    groups, first, counts = np.unique(
+        codes[dropped], return_index=True, return_counts=True
+    )
+    # The first dropped row of each group carries its labels
+    first = np.flatnonzero(dropped)[first]
+
+    rows = {
+        name: np.full(len(groups), np.nan)
+        if values.dtype.kind in "fiub"
+        else np.full(len(groups), None, dtype=object)
+        for name, values in columns.items()
+    }
+    for name in GROUP_COLUMNS + ["analysis_type", "alpha"]:
+        if name in columns:
+            rows[name] = columns[name][first]
+    rows["dimension_value"] = np.array(
+        [f"{label} ({count:,})" for count in counts], dtype=object
+    )
+
+    if traffic is not None:
+        control_n, treatment_n = traffic
+        means = {}
+        for name, n in (
+            ("control_variant_mean", control_n),
+            ("treatment_variant_mean", treatment_n),
+        ):
+            mean = columns[name].astype(float)
+            weight = np.where(dropped & ~np.isnan(mean) & ~np.isnan(n), n, 0.0)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                means[name] = (
+                    _group_sums(codes, weight * np.nan_to_num(mean), num_groups)
+                    / _group_sums(codes, weight, num_groups)
+                )[groups]
+            rows[name] = means[name]
+        rows["ate"] = means["treatment_variant_mean"] - means["control_variant_mean"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            lift = rows["ate"] / means["control_variant_mean"]
+        rows["%_lift"] = np.where(np.isinf(lift), np.nan, lift)
+
+    return groups, rows
+
+
+def prune_rows(columns, pruning, traffic=None):
+    """
+    Applies a Pruning to the columns of a prepared summary, given as a dict of
+    equally long arrays keyed by source column name, and returns them pruned in
+    the same form, in their original order with each Other row after the last
+    row of its group.
+
+    ``traffic`` is the pair of control and treatment sample size arrays; it is
+    required to rank by traffic and used to pool the means of Other rows.
+    Significance is the adjusted p-value, when present, below alpha.
+    """
+    if pruning.by == "traffic" and traffic is None:
+        raise ValueError(
+            "Pruning by traffic needs the control_variant_n and treatment_variant_n "
+            "columns. Add them or prune by 'lift'."
+        )
+
+    num_rows = len(columns["metric_alias"])
+    is_total = columns["dimension_name"] == TOTAL_DIMENSION
+    codes = (
+        pd.DataFrame({name: columns[name] for name in GROUP_COLUMNS})
+        .groupby(GROUP_COLUMNS, sort=False, dropna=False)
+        .ngroup()
+        .to_numpy()
+    )
+    num_groups = codes.max() + 1 if num_rows else 0
+
+    if pruning.by == "traffic":
+        score = np.nan_to_num(traffic[0].astype(float)) + np.nan_to_num(
+            traffic[1].astype(float)
+        )
+    else:
+        score = np.abs(columns["%_lift"].astype(float))
+    score = np.where(np.isnan(score), -np.inf, score)
+
+    # Rank within each group, highest score first
+    order = np.lexsort((-score, codes))
+    sorted_codes = codes[order]
+    starts = np.r_[0, np.flatnonzero(np.diff(sorted_codes)) + 1]
+    sizes = np.diff(np.r_[starts, num_rows])
+    rank = np.empty(num_rows, dtype=np.int64)
+    rank[order] = np.arange(num_rows) - np.repeat(starts, sizes)
+
+    keep = rank < pruning.top_k
+    if pruning.keep_significant:
+        p_value = columns.get("adjusted_p_value", columns["p_value"]).astype(float)
+        keep |= p_value < columns["alpha"].astype(float)
+    keep |= is_total
+
+    if pruning.max_rows is not None:
+        keep = _cap_rows(keep, is_total, rank, codes, num_groups, pruning.max_rows)
+
+    dropped = ~keep & ~is_total
+    # A single dropped row would only be replaced by an Other row of its own
+    num_dropped = np.bincount(codes[dropped], minlength=num_groups)
+    keep |= dropped & (num_dropped[codes] == 1)
+    dropped &= ~keep
+
+    groups, other = _get_other_rows(
+        columns, dropped, codes, num_groups, pruning.other_label, traffic
+    )
+
+    # Other rows go right after the last row of their group
+    last_row = np.zeros(num_groups, dtype=np.int64)
+    np.maximum.at(last_row, codes, np.arange(num_rows))
+    positions = np.r_[np.flatnonzero(keep) * 2, last_row[groups] * 2 + 1]
+    output_order = np.argsort(positions, kind="stable")
+
+    return {
+        name: np.concatenate([values[keep], other[name]])[output_order]
+        for name, values in columns.items()
+    }
+
+
+def _cap_rows(keep, is_total, rank, codes, num_groups, max_rows):
+    """
+    Drops the lowest ranked kept rows, across groups, until the kept rows and the
+    Other rows they leave fit in max_rows. TOTAL rows and one row per group stay
+    even if they alone exceed it.
+    """
+    candidates = np.flatnonzero(keep & ~is_total)
+    candidates = candidates[np.lexsort((candidates, rank[candidates]))]
+
+    # A group of n rows keeping k of them shows min(k + 1, n) rows, since a single
+    # dropped row is kept: every kept candidate adds a row, except the last row
+    # of a group, which only takes the place of its Other row
+    group_rows = np.bincount(codes[~is_total], minlength=num_groups)
+    candidate_codes = codes[candidates]
+    order = np.argsort(candidate_codes, kind="stable")
+    counts = np.bincount(candidate_codes, minlength=num_groups)
+    starts = np.cumsum(counts) - counts
+    position = np.empty(len(candidates), dtype=np.int64)
+    position[order] = np.arange(len(candidates)) - np.repeat(starts, counts)
+    adds_row = position < group_rows[candidate_codes] - 1
+
+    # Rows of the summary when the first m candidates are kept, for every m
+    total_rows = is_total.sum() + (group_rows > 0).sum() + np.r_[0, np.cumsum(adds_row)]
+    limit = max(max_rows, total_rows[0])
+    num_kept = np.searchsorted(total_rows, limit, side="right") - 1
+
+    capped = is_total.copy()
+    capped[candidates[:num_kept]] = True
+    return capped
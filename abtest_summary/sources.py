@@ -0,0 +1,66 @@
+import os
+
+from .create import COLUMN_HEADERS, DERIVED_COLUMNS
+
+# Columns read by default: those the summary preparation needs
+SUMMARY_INPUT_COLUMNS = [col for col in COLUMN_HEADERS if col not in DERIVED_COLUMNS]
+
+
+def _get_filter_expression(filters):
+    """Turns {column: value or list of values} into a pyarrow.dataset expression."""
+    import pyarrow.dataset as ds
+
+    expression = None
+    for column, value in filters.items():
+        if isinstance(value, (list, tuple, set)):
+            condition = ds.field(column).isin(list(value))
+        else:
+            condition = ds.field(column) == value
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def iter_result_batches(
+    source,
+    filters: dict | None = None,
+    columns: list | None = None,
+    batch_size: int = 65_536,
+    format: str | None = None,
+):
+    """
+    Scans experiment results from Parquet or CSV files and yields pyarrow
+    RecordBatches of at most ``batch_size`` rows, ready for
+    ``GoogleSheetABTest.stream_summary_sheet``.
+
+    ``source`` is a file, a directory or a list of files; ``format`` ("parquet" or
+    "csv") is guessed from the first file's extension when omitted. ``filters``
+    maps a column to a value or a list of accepted values, e.g.
+    ``{"experiment_name": "checkout_v2", "metric_alias": ["revenue", "orders"]}``.
+    Filters are pushed down to the scan, so Parquet row groups whose statistics
+    exclude them are skipped, and only ``columns`` (by default the summary's
+    input columns) are read. Peak memory follows ``batch_size``, not the file size.
+
+    Requires pyarrow.
+    """
+    try:
+        import pyarrow.dataset as ds
+    except ImportError as e:
+        raise ImportError("Reading Parquet or CSV results requires pyarrow.") from e
+
+    if format is None:
+        first = source[0] if isinstance(source, (list, tuple)) else source
+        if os.path.isdir(first):
+            format = "parquet"
+        else:
+            name = os.fspath(first).lower()
+            format = "csv" if name.endswith((".csv", ".csv.gz")) else "parquet"
+
+    dataset = ds.dataset(source, format=format)
+    scanner = dataset.scanner(
+        columns=columns or SUMMARY_INPUT_COLUMNS,
+        filter=_get_filter_expression(filters) if filters else None,
+        batch_size=batch_size,
+    )
+    for batch in scanner.to_batches():
+        if batch.num_rows:
+            yield batch
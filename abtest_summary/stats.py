@@ -0,0 +1,424 @@
+import numpy as np
+import pandas as pd
+
+# Columns identifying one comparison in the summary
+KEY_COLUMNS = ["metric_alias", "dimension_name", "dimension_value"]
+
+# Columns expected by GoogleSheetABTest.create_summary_sheet
+SUMMARY_COLUMNS = [
+    "metric_alias",
+    "treatment_variant_name",
+    "dimension_name",
+    "dimension_value",
+    "analysis_type",
+    "alpha",
+    "control_variant_mean",
+    "treatment_variant_mean",
+    "p_value",
+    "ate",
+    "ate_ci_lower",
+    "ate_ci_upper",
+    "control_variant_n",
+    "treatment_variant_n",
+]
+
+# Rational approximation of the inverse normal CDF (P. J. Acklam)
+_PPF_A = [
+    -3.969683028665376e01,
+    2.209460984245205e02,
+    -2.759285104469687e02,
+    1.383577518672690e02,
+    -3.066479806614716e01,
+    2.506628277459239e00,
+]
+_PPF_B = [
+    -5.447609879822406e01,
+    1.615858368580409e02,
+    -1.556989798598866e02,
+    6.680131188771972e01,
+    -1.328068155288572e01,
+]
+_PPF_C = [
+    -7.784894002430293e-03,
+    -3.223964580411365e-01,
+    -2.400758277161838e00,
+    -2.549732539343734e00,
+    4.374664141464968e00,
+    2.938163982698783e00,
+]
+_PPF_D = [
+    7.784695709041462e-03,
+    3.224671290700398e-01,
+    2.445134137142996e00,
+    3.754408661907416e00,
+]
+_PPF_LOW = 0.02425
+
+# Chebyshev fit of erfc with a relative error below 1.2e-7 everywhere
+_ERFC_COEFFS = [
+    -1.26551223,
+    1.00002368,
+    0.37409196,
+    0.09678418,
+    -0.18628806,
+    0.27886807,
+    -1.13520398,
+    1.48851587,
+    -0.82215223,
+    0.17087277,
+]
+
+# Lanczos series for log-gamma, accurate to about 2e-10
+_LANCZOS = [
+    76.18009172947146,
+    -86.50532032941677,
+    24.01409824083091,
+    -1.231739572450155,
+    0.1208650973866179e-2,
+    -0.5395239384953e-5,
+]
+_LOG_SQRT_PI = 0.5 * np.log(np.pi)
+
+
+def _erfc(x):
+    """Vectorized complementary error function."""
+    x = np.asarray(x, dtype=float)
+    z = np.abs(x)
+    t = 1.0 / (1.0 + 0.5 * z)
+    poly = np.zeros_like(t)
+    for coeff in reversed(_ERFC_COEFFS[1:]):
+        poly = t * (coeff + poly)
+    ans = t * np.exp(-z * z + _ERFC_COEFFS[0] + poly)
+    return np.where(x >= 0, ans, 2.0 - ans)
+
+
+def norm_sf(x):
+    """Survival function of the standard normal distribution."""
+    return 0.5 * _erfc(np.asarray(x, dtype=float) / np.sqrt(2.0))
+
+
+def norm_ppf(p):
+    """Inverse CDF of the standard normal distribution."""
+    p = np.asarray(p, dtype=float)
+    x = np.full_like(p, np.nan)
+
+    low = (p > 0) & (p < _PPF_LOW)
+    high = (p > 1 - _PPF_LOW) & (p < 1)
+    mid = (p >= _PPF_LOW) & (p <= 1 - _PPF_LOW)
+
+    q = np.sqrt(-2 * np.log(np.where(low, p, 1 - np.where(high, p, 0.5))))
+    num = np.polyval(_PPF_C, q)
+    den = np.polyval(_PPF_D + [1.0], q)
+    x = np.where(low, num / den, x)
+    x = np.where(high, -num / den, x)
+
+    q = p - 0.5
+    r = q * q
+    x = np.where(
+        mid, np.polyval(_PPF_A, r) * q / np.polyval(_PPF_B + [1.0], r), x
+    )
+
+    x = np.where(p == 0, -np.inf, x)
+    return np.where(p == 1, np.inf, x)
+
+
+def _lgamma(x):
+    """Vectorized log-gamma function for positive arguments."""
+    x = np.asarray(x, dtype=float)
+    series = np.full_like(x, 1.000000000190015)
+    for j, coeff in enumerate(_LANCZOS):
+        series += coeff / (x + 1 + j)
+    shifted = x + 5.5
+    return (
+        (x + 0.5) * np.log(shifted)
+        - shifted
+        + np.log(2.5066282746310005 * series / x)
+    )
+
+
+def _lgamma_half_step(a):
+    """Returns ``lgamma(a + 1/2) - lgamma(a)`` without cancellation for large ``a``."""
+    a = np.asarray(a, dtype=float)
+    large = a > 50
+    big = np.where(large, a, 100.0)
+    # Asymptotic expansion, far below double precision once a > 50
+    series = (
+        0.5 * np.log(big)
+        - 1 / (8 * big)
+        + 1 / (192 * big**3)
+        + 1 / (640 * big**5)
+        - 17 / (14336 * big**7)
+    )
+    small = np.where(large, 1.0, a)
+    return np.where(large, series, _lgamma(small + 0.5) - _lgamma(small))
+
+
+def _beta_cf(a, b, x, max_iter=200):
+    """Continued fraction of the incomplete beta function (modified Lentz)."""
+    tiny = 1e-300
+    c = np.ones_like(x)
+    d = 1 - (a + b) * x / (a + 1)
+    d = 1 / np.where(np.abs(d) < tiny, tiny, d)
+    h = d
+    active = np.ones(x.shape, dtype=bool)
+    for m in range(1, max_iter + 1):
+        for numerator in (
+            m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+            -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1)),
+        ):
+            d = 1 + numerator * d
+            d = 1 / np.where(np.abs(d) < tiny, tiny, d)
+            c = 1 + numerator / c
+            c = np.where(np.abs(c) < tiny, tiny, c)
+            delta = c * d
+            h = np.where(active, h * delta, h)
+        active &= np.abs(delta - 1) > 3e-16
+        if not active.any():
+            break
+    return h
+
+
+def t_sf(t, df):
+    """
+    Survival function of Student's t distribution with ``df`` degrees of freedom.
+
+    ``df`` may be fractional, as for Welch's test; an infinite ``df`` gives the
+    standard normal distribution.
+    """
+    t, df = np.broadcast_arrays(
+        np.asarray(t, dtype=float), np.asarray(df, dtype=float)
+    )
+    normal = np.isinf(df)
+    df = np.where(normal, 1.0, df)
+    t2 = np.where(np.isinf(t), 1.0, t * t)
+
+    # Two-sided tail I_x(df / 2, 1 / 2) at x = df / (df + t^2), in log space
+    a = df / 2
+    log_x = -np.log1p(t2 / df)
+    with np.errstate(divide="ignore"):
+        log_1mx = np.log(t2) - np.log(df + t2)
+        front = np.exp(
+            a * log_x + 0.5 * log_1mx + _lgamma_half_step(a) - _LOG_SQRT_PI
+        )
+    # The continued fraction converges fast below (a + 1) / (a + b + 2) only
+    swap = np.exp(log_x) > (a + 1) / (a + 2.5)
+    cf = _beta_cf(
+        np.where(swap, 0.5, a),
+        np.where(swap, a, 0.5),
+        np.where(swap, t2 / (df + t2), np.exp(log_x)),
+    )
+    tail = np.where(swap, 1 - 2 * front * cf, front * cf / a)
+    tail = np.where(t2 == 0, 1.0, np.where(np.isinf(t), 0.0, tail))
+
+    sf = np.where(t >= 0, tail / 2, 1 - tail / 2)
+    return np.where(normal, norm_sf(t), sf)
+
+
+def _t_pdf(t, df):
+    """Density of Student's t distribution for finite ``df``."""
+    return np.exp(
+        _lgamma_half_step(df / 2)
+        - _LOG_SQRT_PI
+        - 0.5 * np.log(df)
+        - (df + 1) / 2 * np.log1p(t * t / df)
+    )
+
+
+def t_ppf(p, df, max_iter=50):
+    """Inverse CDF of Student's t distribution, the normal one for infinite ``df``."""
+    p, df = np.broadcast_arrays(
+        np.asarray(p, dtype=float), np.asarray(df, dtype=float)
+    )
+    normal = np.isinf(df)
+    df = np.where(normal, 1.0, df)
+
+    # Cornish-Fisher expansion around the normal quantile of the upper tail
+    q = np.minimum(p, 1 - p)
+    z = -norm_ppf(q)
+    t = (
+        z
+        + (z**3 + z) / (4 * df)
+        + (5 * z**5 + 16 * z**3 + 3 * z) / (96 * df**2)
+        + (3 * z**7 + 19 * z**5 + 17 * z**3 - 15 * z) / (384 * df**3)
+        + (79 * z**9 + 776 * z**7 + 1482 * z**5 - 1920 * z**3 - 945 * z)
+        / (92160 * df**4)
+    )
+    # Newton steps; the tail is convex, so they converge monotonically
+    with np.errstate(invalid="ignore"):
+        for _ in range(max_iter):
+            step = (t_sf(t, df) - q) / _t_pdf(t, df)
+            t = np.where(np.isfinite(step), t + step, t)
+            if not (np.abs(step) > 1e-12 * np.abs(t)).any():
+                break
+
+    t = np.where(p < 0.5, -t, t)
+    return np.where(normal, norm_ppf(p), t)
+
+
+def _variant_moments(df):
+    """Returns the per-row sample size, mean and variance, and a proportion mask."""
+    n = df["n"].to_numpy(dtype=float)
+
+    if "conversions" in df:
+        conversions = df["conversions"].to_numpy(dtype=float)
+        is_proportion = ~np.isnan(conversions)
+    else:
+        conversions = np.full_like(n, np.nan)
+        is_proportion = np.zeros(len(df), dtype=bool)
+
+    if "sum" in df:
+        total = np.where(is_proportion, conversions, df["sum"].to_numpy(dtype=float))
+        sum_sq = df["sum_sq"].to_numpy(dtype=float)
+    else:
+        total = conversions
+        sum_sq = np.full_like(n, np.nan)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = total / n
+        # Bernoulli variance for conversions, unbiased sample variance otherwise
+        variance = np.where(
+            is_proportion,
+            mean * (1 - mean),
+            (sum_sq - n * mean**2) / (n - 1),
+        )
+    return n, mean, np.maximum(variance, 0), is_proportion
+
+
+def compute_effects(
+    df,
+    control_variant: str,
+    alpha: float = 0.05,
+    variant_col: str = "variant_name",
+):
+    """
+    Computes treatment effects from per-variant sufficient statistics.
+
+    ``df`` has one row per metric, dimension and variant with the columns in
+    ``KEY_COLUMNS``, ``variant_col``, ``n`` and either ``sum``/``sum_sq`` for
+    continuous metrics or ``conversions`` for conversion metrics. An ``alpha``
+    column, when present, overrides the ``alpha`` argument per row.
+
+    Every treatment row is compared with the ``control_variant`` row sharing its
+    keys, which must exist. Continuous metrics use Welch's unequal variance
+    t-test with Welch-Satterthwaite degrees of freedom, and conversion metrics
+    an unpooled two-proportion z-test. The result has the columns
+    ``create_summary_sheet`` expects, plus the sample size of each variant.
+    """
+    is_control = (df[variant_col] == control_variant).to_numpy()
+    control = df.loc[is_control]
+    treatment = df.loc[~is_control]
+
+    control_keys = pd.MultiIndex.from_frame(control[KEY_COLUMNS])
+    if not control_keys.is_unique:
+        raise ValueError(
+            f"Expected one '{control_variant}' row per metric and dimension value."
+        )
+
+    # Align every treatment row with its control row in one vectorized join
+    positions = control_keys.get_indexer(
+        pd.MultiIndex.from_frame(treatment[KEY_COLUMNS])
+    )
+    unmatched = positions < 0
+    if unmatched.any():
+        example = treatment.loc[unmatched, KEY_COLUMNS].iloc[0].tolist()
+        raise ValueError(
+            f"Found no '{control_variant}' row for {unmatched.sum()} treatment "
+            f"rows, e.g. for {example}."
+        )
+    control = control.iloc[positions]
+
+    n_c, mean_c, var_c, _ = _variant_moments(control)
+    n_t, mean_t, var_t, is_proportion = _variant_moments(treatment)
+
+    if "alpha" in treatment:
+        alphas = treatment["alpha"].to_numpy(dtype=float)
+    else:
+        alphas = np.full(len(treatment), alpha)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ate = mean_t - mean_c
+        se_t2 = var_t / n_t
+        se_c2 = var_c / n_c
+        se = np.sqrt(se_t2 + se_c2)
+        statistic = ate / se
+        # Welch-Satterthwaite; infinite degrees of freedom make the z-test
+        dof = np.where(
+            is_proportion,
+            np.inf,
+            (se_t2 + se_c2) ** 2 / (se_t2**2 / (n_t - 1) + se_c2**2 / (n_c - 1)),
+        )
+    p_value = 2 * t_sf(np.abs(statistic), dof)
+    margin = t_ppf(1 - alphas / 2, dof) * se
+
+    return pd.DataFrame(
+        {
+            "metric_alias": treatment["metric_alias"].to_numpy(),
+            "treatment_variant_name": treatment[variant_col].to_numpy(),
+            "dimension_name": treatment["dimension_name"].to_numpy(),
+            "dimension_value": treatment["dimension_value"].to_numpy(),
+            "analysis_type": np.where(is_proportion, "Z-Test", "Welch"),
+            "alpha": alphas,
+            "control_variant_mean": mean_c,
+            "treatment_variant_mean": mean_t,
+            "p_value": p_value,
+            "ate": ate,
+            "ate_ci_lower": ate - margin,
+            "ate_ci_upper": ate + margin,
+            "control_variant_n": n_c,
+            "treatment_variant_n": n_t,
+        },
+        columns=SUMMARY_COLUMNS,
+    )
+
+
+def adjust_p_values(p_values, method: str = "bh", groups=None):
+    """
+    Adjusts p-values for multiple testing in one vectorized pass.
+
+    ``method`` is ``"bh"`` (Benjamini-Hochberg), ``"holm"`` or ``"bonferroni"``.
+    ``groups`` optionally splits the tests into families corrected independently:
+    an array of labels, or a DataFrame whose columns jointly define the family.
+    Missing p-values are left missing and do not count as tests.
+    """
+    if method not in ("bh", "holm", "bonferroni"):
+        raise ValueError(
+            f"Unknown p-value adjustment '{method}'. Use 'bh', 'holm' or 'bonferroni'."
+        )
+
+    p = np.asarray(p_values, dtype=float)
+    if groups is None:
+        codes = np.zeros(len(p), dtype=np.int64)
+    elif isinstance(groups, pd.DataFrame):
+        codes = (
+            groups.groupby(list(groups.columns), sort=False, dropna=False)
+            .ngroup()
+            .to_numpy()
+        )
+    else:
+        codes = pd.factorize(np.asarray(groups), use_na_sentinel=False)[0]
+
+    # Sort by family, then by p-value with missing values last in each family
+    order = np.lexsort((p, codes))
+    p_sorted = p[order]
+    codes_sorted = codes[order]
+    tested = ~np.isnan(p_sorted)
+
+    starts = np.r_[0, np.flatnonzero(np.diff(codes_sorted)) + 1]
+    sizes = np.diff(np.r_[starts, len(p)])
+    family = np.repeat(np.arange(len(starts)), sizes)
+    rank = np.arange(len(p)) - np.repeat(starts, sizes)
+    m = np.bincount(family, weights=tested, minlength=len(starts))[family]
+
+    if method == "bonferroni":
+        adjusted = p_sorted * m
+    elif method == "holm":
+        adjusted = pd.Series(np.where(tested, p_sorted * (m - rank), 0))
+        adjusted = adjusted.groupby(family).cummax().to_numpy()
+    else:
+        adjusted = pd.Series(np.where(tested, p_sorted * m / (rank + 1), np.inf))
+        # Running minimum from the largest p-value down, within each family
+        adjusted = adjusted[::-1].groupby(family[::-1]).cummin()[::-1].to_numpy()
+
+    result = np.empty(len(p))
+    result[order] = np.where(tested, np.minimum(adjusted, 1.0), np.nan)
+    return result
@@ -0,0 +1,461 @@
+import json
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from .stats import SUMMARY_COLUMNS
+
+# Grid size of a tab added without gridProperties, as in Sheets
+DEFAULT_ROW_COUNT = 1000
+DEFAULT_COLUMN_COUNT = 26
+
+# Request kinds that only change the look of a tab, accepted and not simulated
+FORMATTING_REQUESTS = {
+    "repeatCell",
+    "updateBorders",
+    "updateDimensionProperties",
+    "updateSheetProperties",
+    "mergeCells",
+}
+
+
+@dataclass
+class RecordedCall:
+    """One round trip made to the fake backend."""
+
+    method: str
+    requests: int
+    bytes: int
+    latency: float
+
+
+@dataclass
+class FakeSheet:
+    """The state of one tab: entered values, bandings and conditional rules."""
+
+    sheet_id: int
+    title: str
+    row_count: int = DEFAULT_ROW_COUNT
+    column_count: int = DEFAULT_COLUMN_COUNT
+    # Rows of CellData, holding only userEnteredValue
+    rows: list = field(default_factory=list)
+    banded_range_ids: list = field(default_factory=list)
+    conditional_formats: int = 0
+
+    def write(self, row_index, column_index, rows):
+        """Writes CellData rows with their top-left cell at the given position."""
+        for i, row in enumerate(rows, start=row_index):
+            while len(self.rows) <= i:
+                self.rows.append([])
+            cells = self.rows[i]
+            for j, cell in enumerate(row.get("values", []), start=column_index):
+                while len(cells) <= j:
+                    cells.append({})
+                cells[j] = {"userEnteredValue": cell.get("userEnteredValue", {})}
+
+    def values(self):
+        """Returns the entered values row by row, as plain Python values."""
+        return [
+            [
+                next(iter(cell.get("userEnteredValue", {}).values()), None)
+                for cell in row
+            ]
+            for row in self.rows
+        ]
+
+
+def _http_error(status, message):
+    import httplib2
+    from googleapiclient.errors import HttpError
+
+    content = json.dumps({"error": {"code": status, "message": message}})
+    return HttpError(httplib2.Response({"status": status}), content.encode("utf-8"))
+
+
+def _to_cell_data(value):
+    if isinstance(value, bool):
+        return {"userEnteredValue": {"boolValue": value}}
+    if isinstance(value, (int, float)):
+        return {"userEnteredValue": {"numberValue": float(value)}}
+    return {"userEnteredValue": {"stringValue": str(value)}}
+
+
+class FakeBackend:
+    """
+    An in-memory spreadsheet behind fake Sheets and gspread clients.
+
+    Pass ``backend.service`` and ``backend.gc`` to ``GoogleSheetABTest``, or
+    ``FakeAsyncTransport(backend)`` to ``aio.AsyncGoogleSheetABTest``, to publish
+    without credentials. Every round trip is recorded in ``calls`` with its number
+    of requests, serialized bytes and simulated latency: ``latency`` seconds per
+    call plus the upload time at ``bytes_per_second``. Calls sleep for their
+    simulated latency, so concurrency behaves as against the real API.
+
+    Values, tabs, bandings and conditional rules are simulated, and writing past
+    the grid fails as it does in Sheets; other formatting is accepted and ignored.
+    """
+
+    def __init__(self, latency: float = 0.0, bytes_per_second: float | None = None):
+
+        self.latency = latency
+        self.bytes_per_second = bytes_per_second
+        self.sheets = {}
+        self.calls = []
+        self.lock = threading.Lock()
+        self._next_ids = iter(range(1, 2**31))
+
+        self.service = FakeSheetsService(self)
+        self.gc = FakeGspreadClient(self)
+
+    def reset_calls(self):
+        with self.lock:
+            self.calls = []
+
+    def stats(self):
+        """Totals the recorded calls: round trips, requests, bytes and latency."""
+        with self.lock:
+            calls = list(self.calls)
+        return {
+            "calls": len(calls),
+            "requests": sum(call.requests for call in calls),
+            "bytes": sum(call.bytes for call in calls),
+            "latency": sum(call.latency for call in calls),
+        }
+
+    def get_sheet(self, title):
+        """Returns the tab with this title, or None."""
+        return next((s for s in self.sheets.values() if s.title == title), None)
+
+    def simulated_latency(self, num_bytes):
+        latency = self.latency
+        if self.bytes_per_second:
+            latency += num_bytes / self.bytes_per_second
+        return latency
+
+    def _record(self, method, payload, requests, sleep=True):
+        num_bytes = len(json.dumps(payload)) if payload is not None else 0
+        latency = self.simulated_latency(num_bytes)
+        with self.lock:
+            self.calls.append(RecordedCall(method, requests, num_bytes, latency))
+        if latency and sleep:
+            time.sleep(latency)
+        return latency
+
+    def batch_update(self, body, sleep=True):
+        self._record("batchUpdate", body, len(body["requests"]), sleep)
+        with self.lock:
+            # Unlike Sheets, a failing request does not roll back the ones before it
+            return {"replies": [self._apply(request) for request in body["requests"]]}
+
+    def _get_tab(self, sheet_id):
+        sheet = self.sheets.get(sheet_id)
+        if sheet is None:
+            raise _http_error(400, f"No grid with id: {sheet_id}")
+        return sheet
+
+    def _apply(self, request):
+        (kind, body), = request.items()
+
+        if kind == "addSheet":
+            properties = body["properties"]
+            title = properties["title"]
+            if self.get_sheet(title) is not None:
+                raise _http_error(
+                    400,
+                    f'Invalid requests[0].addSheet: A sheet with the name "{title}" '
+                    "already exists. Please enter another name.",
+                )
+            sheet_id = properties.get("sheetId", next(self._next_ids))
+            grid = properties.get("gridProperties", {})
+            sheet = FakeSheet(
+                sheet_id,
+                title,
+                grid.get("rowCount", DEFAULT_ROW_COUNT),
+                grid.get("columnCount", DEFAULT_COLUMN_COUNT),
+            )
+            self.sheets[sheet_id] = sheet
+            return {"addSheet": {"properties": {"sheetId": sheet_id, "title": title}}}
+
+        if kind == "deleteSheet":
+            self._get_tab(body["sheetId"])
+            del self.sheets[body["sheetId"]]
+        elif kind == "updateCells" and "range" in body:
+            # Clears the entered values of a range, by default the whole tab
+            grid_range = body["range"]
+            sheet = self._get_tab(grid_range["sheetId"])
+            start_column = grid_range.get("startColumnIndex", 0)
+            end_column = grid_range.get("endColumnIndex", sheet.column_count)
+            for row in sheet.rows[
+                grid_range.get("startRowIndex", 0) : grid_range.get(
+                    "endRowIndex", sheet.row_count
+                )
+            ]:
+                for j in range(start_column, min(end_column, len(row))):
+                    row[j] = {}
+        elif kind == "updateCells":
+            start = body["start"]
+            sheet = self._get_tab(start["sheetId"])
+            rows = body["rows"]
+            width = max((len(row.get("values", [])) for row in rows), default=0)
+            if (
+                start["rowIndex"] + len(rows) > sheet.row_count
+                or start["columnIndex"] + width > sheet.column_count
+            ):
+                raise _http_error(
+                    400, "Invalid requests[0].updateCells: Range exceeds grid limits."
+                )
+            sheet.write(start["rowIndex"], start["columnIndex"], rows)
+        elif kind == "appendCells":
+            sheet = self._get_tab(body["sheetId"])
+            sheet.write(len(sheet.rows), 0, body["rows"])
+            sheet.row_count = max(sheet.row_count, len(sheet.rows))
+        elif kind == "deleteDimension":
+            grid_range = body["range"]
+            sheet = self._get_tab(grid_range["sheetId"])
+            start, end = grid_range["startIndex"], grid_range["endIndex"]
+            if grid_range["dimension"] == "ROWS":
+                del sheet.rows[start:end]
+                sheet.row_count -= end - start
+            else:
+                for row in sheet.rows:
+                    del row[start:end]
+                sheet.column_count -= end - start
+        elif kind == "appendDimension":
+            sheet = self._get_tab(body["sheetId"])
+            if body["dimension"] == "ROWS":
+                sheet.row_count += body["length"]
+            else:
+                sheet.column_count += body["length"]
+        elif kind == "addBanding":
+            sheet = self._get_tab(body["bandedRange"]["range"]["sheetId"])
+            banded_range_id = next(self._next_ids)
+            sheet.banded_range_ids.append(banded_range_id)
+            return {"addBanding": {"bandedRange": {"bandedRangeId": banded_range_id}}}
+        elif kind == "deleteBanding":
+            for sheet in self.sheets.values():
+                if body["bandedRangeId"] in sheet.banded_range_ids:
+                    sheet.banded_range_ids.remove(body["bandedRangeId"])
+                    break
+            else:
+                raise _http_error(400, f"No banded range with id: {body['bandedRangeId']}")
+        elif kind == "addConditionalFormatRule":
+            grid_range = body["rule"]["ranges"][0]
+            self._get_tab(grid_range["sheetId"]).conditional_formats += 1
+        elif kind == "deleteConditionalFormatRule":
+            sheet = self._get_tab(body["sheetId"])
+            if body["index"] >= sheet.conditional_formats:
+                raise _http_error(400, f"No conditional format at index {body['index']}")
+            sheet.conditional_formats -= 1
+        elif kind not in FORMATTING_REQUESTS:
+            raise _http_error(400, f"Unsupported request in the fake backend: {kind}")
+        return {}
+
+    def get(self, ranges=None, include_grid_data=False, sleep=True):
+        self._record("get", None, 0, sleep)
+        with self.lock:
+            if ranges:
+                sheets = []
+                for a1 in ranges:
+                    title = re.sub(r"!.*$", "", a1)
+                    if title.startswith("'"):
+                        title = title[1:-1].replace("''", "'")
+                    sheet = self.get_sheet(title)
+                    if sheet is None:
+                        raise _http_error(400, f"Unable to parse range: {a1}")
+                    sheets.append(sheet)
+            else:
+                sheets = list(self.sheets.values())
+            return {"sheets": [self._describe(s, include_grid_data) for s in sheets]}
+
+    @staticmethod
+    def _describe(sheet, include_grid_data):
+        description = {
+            "properties": {
+                "sheetId": sheet.sheet_id,
+                "title": sheet.title,
+                "gridProperties": {
+                    "rowCount": sheet.row_count,
+                    "columnCount": sheet.column_count,
+                },
+            },
+            "bandedRanges": [{"bandedRangeId": i} for i in sheet.banded_range_ids],
+            "conditionalFormats": [
+                {"ranges": [{"sheetId": sheet.sheet_id}]}
+            ]
+            * sheet.conditional_formats,
+        }
+        if include_grid_data:
+            description["data"] = [
+                {"rowData": [{"values": list(row)} for row in sheet.rows]}
+            ]
+        return description
+
+
+class FakeAsyncTransport:
+    """
+    Stands in for the aiohttp transport of ``aio.AsyncGoogleSheetABTest``: serves
+    the Sheets REST calls from a FakeBackend and awaits their simulated latency.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    async def request(self, method, url, body=None):
+        """Returns the status and JSON content of a Sheets REST call."""
+        import asyncio
+        from urllib.parse import parse_qs, urlparse
+
+        from googleapiclient.errors import HttpError
+
+        parsed = urlparse(url)
+        # The "server" side runs in a thread, as it would not hold the client's loop
+        try:
+            if parsed.path.endswith(":batchUpdate"):
+                response = await asyncio.to_thread(
+                    lambda: self.backend.batch_update(json.loads(body), sleep=False)
+                )
+                latency = self.backend.simulated_latency(len(body))
+            else:
+                query = parse_qs(parsed.query)
+                response = await asyncio.to_thread(
+                    self.backend.get,
+                    query.get("ranges"),
+                    query.get("includeGridData") == ["true"],
+                    sleep=False,
+                )
+                latency = self.backend.simulated_latency(0)
+        except HttpError as e:
+            return e.resp.status, e.content
+        if latency:
+            await asyncio.sleep(latency)
+        return 200, json.dumps(response).encode("utf-8")
+
+    async def close(self):
+        pass
+
+
+class FakeRequest:
+    """A prepared call, sent when executed like googleapiclient's HttpRequest."""
+
+    def __init__(self, func):
+        self.func = func
+
+    def execute(self, num_retries=0):
+        return self.func()
+
+
+class FakeSheetsService:
+    """Stands in for the discovery-built Sheets v4 client."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def spreadsheets(self):
+        return self
+
+    def batchUpdate(self, spreadsheetId, body):
+        return FakeRequest(lambda: self.backend.batch_update(body))
+
+    def get(self, spreadsheetId, ranges=None, includeGridData=False, fields=None):
+        return FakeRequest(lambda: self.backend.get(ranges, includeGridData))
+
+
+class FakeGspreadClient:
+    """Stands in for the gspread client, down to the worksheet calls the publisher makes."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def open_by_key(self, key):
+        return FakeGspreadSpreadsheet(self.backend)
+
+
+class FakeGspreadSpreadsheet:
+    def __init__(self, backend):
+        self.backend = backend
+
+    def worksheet(self, title):
+        # gspread fetches the spreadsheet metadata to find the tab
+        self.backend._record("get", None, 0)
+        if self.backend.get_sheet(title) is None:
+            import gspread
+
+            raise gspread.WorksheetNotFound(title)
+        return FakeWorksheet(self.backend, title)
+
+
+class FakeWorksheet:
+    def __init__(self, backend, title):
+        self.backend = backend
+        self.title = title
+
+    def update(self, values, range_name=None):
+        """Writes rows of values from the top-left cell of range_name, growing the grid."""
+        self.backend._record("values.update", values, 1)
+        match = re.match(r"([A-Z]+)(\d+)", range_name or "A1")
+        column_index = 0
+        for letter in match.group(1):
+            column_index = column_index * 26 + ord(letter) - 64
+        row_index = int(match.group(2)) - 1
+        rows = [{"values": [_to_cell_data(value) for value in row]} for row in values]
+
+        with self.backend.lock:
+            sheet = self.backend.get_sheet(self.title)
+            sheet.write(row_index, column_index - 1, rows)
+            sheet.row_count = max(sheet.row_count, row_index + len(rows))
+            sheet.column_count = max(
+                sheet.column_count,
+                column_index - 1 + max((len(row) for row in values), default=0),
+            )
+        return {"updatedRows": len(values)}
+
+
+def make_summary_frame(
+    n_rows: int, n_variants: int = 3, n_splits: int = 5, seed: int = 0
+):
+    """
+    Builds a synthetic summary with the columns of ``stats.SUMMARY_COLUMNS``.
+
+    Rows cycle through ``n_variants`` treatments and ``n_splits`` splits (the first
+    one being the total) within each metric, so every row has a unique key.
+    """
+    rng = np.random.default_rng(seed)
+    index = np.arange(n_rows)
+    variant = index % n_variants
+    split = index // n_variants % n_splits
+    metric = index // (n_variants * n_splits)
+
+    control_mean = rng.normal(100, 20, n_rows)
+    ate = rng.normal(0, 5, n_rows)
+    se = rng.uniform(0.5, 5, n_rows)
+    control_n = rng.integers(100, 100_000, n_rows)
+
+    df = pd.DataFrame(
+        {
+            "metric_alias": pd.Series(metric).map("metric_{}".format),
+            "treatment_variant_name": pd.Series(variant).map("variant_{}".format),
+            "dimension_name": np.where(
+                split == 0, "__total_dimension", pd.Series(split).map("split_{}".format)
+            ),
+            "dimension_value": np.where(
+                split == 0, "total", pd.Series(split).map("value_{}".format)
+            ),
+            "analysis_type": "Welch",
+            "alpha": 0.05,
+            "control_variant_mean": control_mean,
+            "treatment_variant_mean": control_mean + ate,
+            "p_value": rng.uniform(0, 1, n_rows),
+            "ate": ate,
+            "ate_ci_lower": ate - 1.96 * se,
+            "ate_ci_upper": ate + 1.96 * se,
+            "control_variant_n": control_n,
+            "treatment_variant_n": (control_n * rng.uniform(0.9, 1.1, n_rows)).astype(
+                np.int64
+            ),
+        }
+    )
+    return df[SUMMARY_COLUMNS]
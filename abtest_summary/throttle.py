@@ -0,0 +1,58 @@
+import asyncio
+import threading
+import time
+
+# Seconds of quota a bucket holds by default: calls may burst that far ahead of
+# the steady rate, so a full minute of quota never lands in the first seconds
+BURST_SECONDS = 3
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket used to keep API calls under a per-minute quota.
+
+    The bucket starts full and holds ``capacity`` tokens, by default
+    BURST_SECONDS worth of quota.
+    """
+
+    def __init__(self, requests_per_minute: float, capacity: float | None = None):
+
+        self.rate = requests_per_minute / 60.0
+        if capacity is None:
+            capacity = max(1.0, self.rate * BURST_SECONDS)
+        self.capacity = capacity
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def _take(self, tokens):
+        """Takes the tokens and returns 0 if available, else the seconds to wait for them."""
+        with self.lock:
+            self._refill()
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return 0
+            return (tokens - self.tokens) / self.rate
+
+    def acquire(self, tokens: float = 1):
+        """Blocks until the requested number of tokens is available."""
+        wait = self._take(tokens)
+        while wait:
+            time.sleep(wait)
+            wait = self._take(tokens)
+
+    async def acquire_async(self, tokens: float = 1):
+        """
+        Waits until the requested number of tokens is available, suspending the
+        asyncio task rather than blocking the event loop. Sync and async callers
+        draw from the same quota.
+        """
+        wait = self._take(tokens)
+        while wait:
+            await asyncio.sleep(wait)
+            wait = self._take(tokens)
@@ -0,0 +1,70 @@
+import threading
+
+import httplib2
+from google.auth.transport.requests import AuthorizedSession
+from requests.adapters import HTTPAdapter
+
+# Same default as googleapiclient's own httplib2 transport
+HTTP_TIMEOUT = 60
+
+
+class SharedSession(AuthorizedSession):
+    """
+    An authorized requests session meant to be shared by every client and thread.
+
+    Connections are kept alive in a pool of pool_size connections per host, and
+    the access token is refreshed under a lock so concurrent requests trigger a
+    single refresh.
+    """
+
+    def __init__(self, credentials, pool_size: int = 10):
+        super().__init__(credentials)
+        self.mount(
+            "https://", HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        )
+        self._refresh_lock = threading.Lock()
+
+    def request(self, method, url, *args, **kwargs):
+        if not self.credentials.valid:
+            with self._refresh_lock:
+                # Another thread may have refreshed while we waited
+                if not self.credentials.valid:
+                    self.credentials.refresh(self._auth_request)
+        kwargs.setdefault("timeout", HTTP_TIMEOUT)
+        return super().request(method, url, *args, **kwargs)
+
+
+class HttplibAdapter:
+    """
+    Exposes a requests session through the httplib2 interface googleapiclient uses,
+    so the discovery client shares the session's connection pool and token.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    def request(
+        self,
+        uri,
+        method="GET",
+        body=None,
+        headers=None,
+        redirections=5,
+        connection_type=None,
+    ):
+        response = self.session.request(
+            method,
+            uri,
+            data=body,
+            headers=headers,
+            allow_redirects=redirections > 0,
+        )
+        info = dict(response.headers)
+        info["status"] = str(response.status_code)
+        resp = httplib2.Response(info)
+        resp.reason = response.reason
+        return resp, response.content
+
+    def close(self):
+        # The session outlives the clients built on top of it
+        pass
@@ -0,0 +1,147 @@
+"""
+Benchmarks the publish path against the in-memory backend of abtest_summary.testing.
+
+For each size and publish mode, reports the time and peak traced memory of each
+phase (preparing the frame, building the requests, publishing end to end), and
+the round trips, requests and payload bytes the publish sent:
+
+    python benchmarks/bench_publish.py --sizes 100 10000 1000000 --latency 0.2
+"""
+
+import argparse
+import contextlib
+import io
+import time
+import tracemalloc
+
+import pandas as pd
+
+from abtest_summary.create import GoogleSheetABTest
+from abtest_summary.testing import FakeBackend, make_summary_frame
+
+DEFAULT_SIZES = [100, 1_000, 10_000, 100_000, 1_000_000]
+
+
+def _peak_memory_mb(func):
+    """Runs func under tracemalloc and returns its peak traced memory in MB."""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+def _build_requests(publisher, df_new, single_batch):
+    if single_batch:
+        requests = publisher._iter_single_batch_requests(1, "bench", df_new)
+        return list(publisher._iter_batches(requests))
+    chunks = list(publisher._iter_row_chunks(df_new))
+    return chunks, publisher._get_formatting_requests(1, df_new)
+
+
+def run_benchmark(
+    n_rows,
+    single_batch,
+    n_variants=3,
+    n_splits=5,
+    latency=0.0,
+    bytes_per_second=None,
+    memory=True,
+):
+    """Benchmarks one summary size and publish mode and returns one row per phase."""
+    df = make_summary_frame(n_rows, n_variants, n_splits)
+    backend = FakeBackend(latency, bytes_per_second)
+    publisher = GoogleSheetABTest(
+        "benchmark",
+        None,
+        read_requests_per_minute=1e9,
+        write_requests_per_minute=1e9,
+        service=backend.service,
+        gc=backend.gc,
+    )
+    df_new = publisher._prepare_summary_frame(df)
+
+    runs = iter(range(10**9))
+
+    def publish():
+        # A new tab per run, and without the status messages
+        with contextlib.redirect_stdout(io.StringIO()):
+            publisher.create_summary_sheet(
+                df, f"bench_{next(runs)}", single_batch=single_batch
+            )
+
+    phases = {
+        "prepare": lambda: publisher._prepare_summary_frame(df),
+        "build": lambda: _build_requests(publisher, df_new, single_batch),
+        "publish": publish,
+    }
+
+    results = []
+    for phase, func in phases.items():
+        backend.reset_calls()
+        start = time.perf_counter()
+        func()
+        row = {
+            "rows": n_rows,
+            "mode": "single" if single_batch else "classic",
+            "phase": phase,
+            "seconds": time.perf_counter() - start,
+        }
+        if phase == "publish":
+            stats = backend.stats()
+            row.update(
+                round_trips=stats["calls"],
+                requests=stats["requests"],
+                payload_mb=stats["bytes"] / 2**20,
+                simulated_latency=stats["latency"],
+            )
+        # Traced in a second run: tracing slows allocations down too much to time them
+        row["peak_mb"] = _peak_memory_mb(func) if memory else float("nan")
+        results.append(row)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--variants", type=int, default=3)
+    parser.add_argument("--splits", type=int, default=5)
+    parser.add_argument(
+        "--mode", choices=["single", "classic", "both"], default="both"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="simulated seconds per API call"
+    )
+    parser.add_argument(
+        "--bandwidth", type=float, default=None, help="simulated upload bytes per second"
+    )
+    parser.add_argument(
+        "--no-memory", action="store_true", help="skip the peak memory runs"
+    )
+    args = parser.parse_args()
+
+    modes = {"single": [True], "classic": [False], "both": [True, False]}[args.mode]
+
+    for n_rows in args.sizes:
+        for single_batch in modes:
+            results = run_benchmark(
+                n_rows,
+                single_batch,
+                args.variants,
+                args.splits,
+                args.latency,
+                args.bandwidth,
+                not args.no_memory,
+            )
+            # Printed as they finish, the largest sizes take a while
+            print(
+                pd.DataFrame(results).to_string(
+                    index=False, float_format="%.3f", na_rep=""
+                )
+            )
+            print()
+
+
+if __name__ == "__main__":
+    main()
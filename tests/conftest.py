@@ -0,0 +1,49 @@
+import pytest
+
+from abtest_summary.aio import AsyncGoogleSheetABTest
+from abtest_summary.create import GoogleSheetABTest
+from abtest_summary.testing import FakeAsyncTransport, FakeBackend
+
+# Quotas high enough for the token buckets never to wait
+REQUESTS_PER_MINUTE = 1_000_000
+
+
+@pytest.fixture
+def backend():
+    return FakeBackend()
+
+
+@pytest.fixture
+def make_publisher(backend):
+    """Builds publishers served by the fake backend, with extra constructor arguments."""
+
+    def make_publisher(**kwargs):
+        return GoogleSheetABTest(
+            "spreadsheet_id",
+            None,
+            read_requests_per_minute=REQUESTS_PER_MINUTE,
+            write_requests_per_minute=REQUESTS_PER_MINUTE,
+            service=backend.service,
+            gc=backend.gc,
+            **kwargs,
+        )
+
+    return make_publisher
+
+
+@pytest.fixture
+def publisher(make_publisher):
+    return make_publisher()
+
+
+@pytest.fixture
+def async_publisher(backend):
+    """An asyncio publisher served by the fake backend, collecting stats."""
+    return AsyncGoogleSheetABTest(
+        "spreadsheet_id",
+        None,
+        read_requests_per_minute=REQUESTS_PER_MINUTE,
+        write_requests_per_minute=REQUESTS_PER_MINUTE,
+        transport=FakeAsyncTransport(backend),
+        collect_stats=True,
+    )
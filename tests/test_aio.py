@@ -0,0 +1,33 @@
+import asyncio
+
+from abtest_summary.testing import make_summary_frame
+
+
+def test_async_publish_many_matches_sync(backend, publisher, async_publisher):
+    frames = {name: make_summary_frame(200, seed=i) for i, name in enumerate("abc")}
+    results = asyncio.run(
+        async_publisher.publish_many(
+            [(df, f"async_{name}") for name, df in frames.items()], max_concurrency=2
+        )
+    )
+    assert [result.status for result in results] == ["created"] * 3
+    assert all(result.stats.api_calls == 1 for result in results)
+
+    for name, df in frames.items():
+        publisher.create_summary_sheet(df, f"sync_{name}", single_batch=True)
+        expected = backend.get_sheet(publisher._get_sheet_title(f"sync_{name}"))
+        tab = backend.get_sheet(publisher._get_sheet_title(f"async_{name}"))
+        assert tab.values() == expected.values()
+        assert tab.conditional_formats == expected.conditional_formats
+
+
+def test_async_publish_reports_existing_tab(async_publisher):
+    df = make_summary_frame(10)
+
+    async def publish_twice():
+        await async_publisher.create_summary_sheet(df, "experiment")
+        return await async_publisher.create_summary_sheet(df, "experiment")
+
+    assert asyncio.run(publish_twice()).status == "exists"
+    # Blocking methods only exist on the wrapped publisher
+    assert not hasattr(async_publisher, "update_summary_sheet")
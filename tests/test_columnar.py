@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from abtest_summary.columnar import get_columns
+from abtest_summary.testing import make_summary_frame
+
+pa = pytest.importorskip("pyarrow")
+
+
+def _to_arrow(df):
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def _to_polars(df):
+    pl = pytest.importorskip("polars")
+    return pl.from_pandas(df)
+
+
+@pytest.fixture
+def summary():
+    df = make_summary_frame(300, seed=4)
+    df.loc[0, "control_variant_mean"] = 0
+    df.loc[1, "ate"] = np.inf
+    df.loc[2, "p_value"] = np.nan
+    df.loc[4, "dimension_value"] = None
+    df["group"] = df["metric_alias"]
+    return df
+
+
+@pytest.mark.parametrize("convert", [_to_arrow, _to_polars])
+def test_preparation_parity(publisher, summary, convert):
+    kwargs = {
+        "variant_mapping": {"variant_1": "Treatment A", "unknown": "Nobody"},
+        "p_value_adjustment": "bh",
+        "adjustment_groups": ["group"],
+    }
+    expected = publisher._prepare_summary_frame(summary, **kwargs)
+    result = publisher._prepare_summary_frame(convert(summary), **kwargs)
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+@pytest.mark.parametrize("convert", [lambda df: df, _to_arrow, _to_polars])
+def test_replace_maps_numeric_ids(convert):
+    df = pd.DataFrame({"variant": [1, 2, 3, 1]})
+    columns = get_columns(convert(df))
+    result = columns.replace("variant", {1: "Treatment A", "x": "y"})
+    assert list(result) == list(df["variant"].replace({1: "Treatment A", "x": "y"}))
+
+
+@pytest.mark.parametrize("convert", [lambda df: df, _to_arrow, _to_polars])
+def test_relabel_keeps_other_types(convert):
+    df = pd.DataFrame({"split": [0, 1, 2], "value": ["total", None, "a"]})
+    columns = get_columns(convert(df))
+    assert list(columns.relabel("split", "total", "TOTAL")) == [0, 1, 2]
+    assert list(columns.relabel("value", "total", "TOTAL")) == ["TOTAL", None, "a"]
+
+
+def test_relabel_nullable_strings():
+    df = pd.DataFrame({"value": pd.Series(["total", pd.NA, "a"], dtype="string")})
+    result = get_columns(df).relabel("value", "total", "TOTAL")
+    assert result[0] == "TOTAL" and pd.isna(result[1]) and result[2] == "a"
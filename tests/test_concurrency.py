@@ -0,0 +1,69 @@
+import pytest
+from googleapiclient.errors import HttpError
+
+from abtest_summary.testing import _http_error, make_summary_frame
+from abtest_summary.throttle import BURST_SECONDS, TokenBucket
+
+
+def test_token_bucket_bursts_a_few_seconds():
+    bucket = TokenBucket(60)
+    immediate = 0
+    while immediate < 60 and not bucket._take(1):
+        immediate += 1
+    assert immediate == BURST_SECONDS
+    # The next token comes at the steady rate, one per second
+    assert 0 < bucket._take(1) <= 1
+
+
+def test_token_bucket_capacity():
+    assert TokenBucket(10).capacity == 1
+    assert TokenBucket(60, capacity=20).capacity == 20
+
+
+def test_publish_many(backend, publisher):
+    df = make_summary_frame(50)
+    results = publisher.publish_many(
+        [(df, "a"), {"df": df, "experiment_name": "b", "single_batch": True}, (df, "a")],
+        max_workers=2,
+    )
+    titles = [publisher._get_sheet_title(name) for name in ("a", "b", "a")]
+    assert [result.experiment_name for result in results] == titles
+    assert sorted(result.status for result in results) == ["created", "created", "exists"]
+    assert backend.get_sheet(titles[1]).values() == backend.get_sheet(titles[0]).values()
+
+
+def test_publish_many_reports_failures(publisher):
+    (result,) = publisher.publish_many([(None, "broken")])
+    assert result.status == "failed"
+    assert result.error is not None
+
+
+def test_non_idempotent_batch_is_not_retried(backend, publisher, monkeypatch):
+    batch_update = backend.batch_update
+
+    def fail_after_applying(body, sleep=True):
+        batch_update(body, sleep)
+        raise _http_error(503, "Backend error")
+
+    monkeypatch.setattr(backend, "batch_update", fail_after_applying)
+    with pytest.raises(HttpError) as info:
+        publisher.create_summary_sheet(make_summary_frame(10), "x", single_batch=True)
+    assert info.value.resp.status == 503
+    assert backend.stats()["calls"] == 1
+
+
+def test_idempotent_batch_is_retried(backend, publisher, monkeypatch):
+    monkeypatch.setattr("time.sleep", lambda seconds: None)
+    batch_update = backend.batch_update
+    failures = [_http_error(503, "Backend error")]
+
+    def fail_once(body, sleep=True):
+        if failures:
+            raise failures.pop()
+        return batch_update(body, sleep)
+
+    publisher.create_summary_sheet(make_summary_frame(10), "x", single_batch=True)
+    monkeypatch.setattr(backend, "batch_update", fail_once)
+    sheet_id = backend.get_sheet(publisher._get_sheet_title("x")).sheet_id
+    publisher._batch_update([{"repeatCell": {"range": {"sheetId": sheet_id}}}])
+    assert not failures
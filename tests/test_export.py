@@ -0,0 +1,99 @@
+from html.parser import HTMLParser
+
+import numpy as np
+import pytest
+
+from abtest_summary.layout import to_hex
+from abtest_summary.testing import make_summary_frame
+
+
+class _TableParser(HTMLParser):
+    """Collects the headings and, per table, the rows of (text, style) cells."""
+
+    def __init__(self):
+        super().__init__()
+        self.headings = []
+        self.tables = []
+        self._text = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "table":
+            self.tables.append([])
+        elif tag == "tr":
+            self.tables[-1].append([])
+        if tag in ("h2", "th", "td"):
+            self._text = ""
+            self._style = dict(attrs).get("style")
+
+    def handle_endtag(self, tag):
+        if tag == "h2":
+            self.headings.append(self._text)
+        elif tag in ("th", "td"):
+            self.tables[-1][-1].append((self._text, self._style))
+        self._text = None
+
+    def handle_data(self, data):
+        if self._text is not None:
+            self._text += data
+
+
+@pytest.fixture
+def summary():
+    df = make_summary_frame(20)
+    df.loc[2, "p_value"] = np.nan
+    return df
+
+
+def test_export_xlsx(publisher, summary, tmp_path):
+    pytest.importorskip("xlsxwriter")
+    openpyxl = pytest.importorskip("openpyxl")
+    path = tmp_path / "summaries.xlsx"
+    long_name = "x" * 40
+    names = publisher.export_workbook(
+        [(summary, "checkout"), (summary, long_name + "1"), (summary, long_name + "2")],
+        str(path),
+    )
+    # Worksheet names are at most 31 characters and unique
+    assert names == [publisher._get_sheet_title("checkout"), "x" * 31, "x" * 29 + "~2"]
+
+    workbook = openpyxl.load_workbook(path)
+    assert workbook.sheetnames == names
+    worksheet = workbook[names[0]]
+    df_new = publisher._prepare_summary_frame(summary)
+    assert (worksheet.max_row, worksheet.max_column) == (21, df_new.shape[1])
+    assert [cell.value for cell in worksheet[1]] == df_new.columns.tolist()
+
+    row = [cell.value for cell in worksheet[2]]
+    assert row[:4] == ["metric_0", "variant_0", "TOTAL", "TOTAL"]
+    assert row[6:] == pytest.approx(df_new.iloc[0, 6:].tolist())
+    assert worksheet["G2"].number_format == "#,##0.00"
+    assert worksheet["M2"].number_format == "0.00%"
+    assert worksheet["I4"].value == "N/A"
+    # Five significance rules and the banding
+    assert sum(len(rules.rules) for rules in worksheet.conditional_formatting) == 6
+
+
+def test_export_html(publisher, summary, tmp_path):
+    path = tmp_path / "summaries.html"
+    experiments = [(summary, "checkout"), (summary.iloc[:5], "search")]
+    publisher.export_workbook(experiments, path)
+
+    parser = _TableParser()
+    parser.feed(path.read_text(encoding="utf-8"))
+    assert parser.headings == [
+        publisher._get_sheet_title("checkout"),
+        publisher._get_sheet_title("search"),
+    ]
+    assert [len(table) for table in parser.tables] == [21, 6]
+
+    df_new = publisher._prepare_summary_frame(summary)
+    header, first, _, third = parser.tables[0][:4]
+    assert [text for text, _ in header] == df_new.columns.tolist()
+    values = df_new.iloc[0]
+    assert first[6][0] == f"{values['Control Mean']:,.2f}"
+    assert first[12][0] == f"{values['%Lift']:.2%}"
+    assert third[8] == ("N/A", None)
+
+    # A p-value above twice alpha is colored as not significant
+    assert values["P-Value"] > 0.1
+    assert first[8][1] == f"background:{to_hex(publisher.negative_back)}"
@@ -0,0 +1,60 @@
+import pandas as pd
+import pytest
+
+from abtest_summary.pruning import Pruning
+from abtest_summary.testing import make_summary_frame
+
+
+@pytest.fixture
+def split_summary():
+    """Two treatments of one metric, each with a TOTAL row and 500 countries."""
+    num_values = 500
+    df = make_summary_frame(2 * (num_values + 1))
+    value = df.index // 2
+    df["metric_alias"] = "metric"
+    df["treatment_variant_name"] = (df.index % 2).map("variant_{}".format)
+    df["dimension_name"] = ["__total_dimension" if v == 0 else "country" for v in value]
+    df["dimension_value"] = ["total" if v == 0 else f"country_{v}" for v in value]
+    return df
+
+
+def _other_rows(df_new):
+    return df_new[df_new["Split Value"].astype(str).str.startswith("Other")]
+
+
+def test_top_k(publisher, split_summary):
+    pruning = Pruning(top_k=3, keep_significant=False)
+    df_new = publisher._prepare_summary_frame(split_summary, pruning=pruning)
+
+    # TOTAL, top 3 and Other per treatment
+    assert len(df_new) == 2 * 5
+    assert _other_rows(df_new)["Split Value"].tolist() == ["Other (497)"] * 2
+
+
+@pytest.mark.parametrize("max_rows", [6, 20, 50, 200])
+def test_max_rows_cap(publisher, split_summary, max_rows):
+    pruning = Pruning(top_k=100, max_rows=max_rows)
+    df_new = publisher._prepare_summary_frame(split_summary, pruning=pruning)
+
+    assert len(df_new) == max_rows
+    assert (df_new["Split"] == "TOTAL").sum() == 2
+    assert len(_other_rows(df_new)) == 2
+
+
+def test_max_rows_below_floor(publisher, split_summary):
+    df_new = publisher._prepare_summary_frame(
+        split_summary, pruning=Pruning(top_k=3, max_rows=1)
+    )
+    # TOTAL and Other rows are never dropped
+    assert len(df_new) == 4
+
+
+def test_single_dropped_row_is_kept(publisher):
+    df = make_summary_frame(300)
+    full = publisher._prepare_summary_frame(df)
+    df_new = publisher._prepare_summary_frame(
+        df, pruning=Pruning(top_k=3, max_rows=50)
+    )
+    # Every split holds one value: nothing can be collapsed
+    assert _other_rows(df_new).empty
+    pd.testing.assert_frame_equal(df_new, full)
@@ -0,0 +1,168 @@
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+from googleapiclient.errors import HttpError
+
+from abtest_summary.cache import PublishCache
+from abtest_summary.testing import _http_error, make_summary_frame
+
+
+def test_single_batch_matches_classic(backend, publisher):
+    df = make_summary_frame(500)
+    publisher.create_summary_sheet(df, "classic")
+    publisher.create_summary_sheet(df, "single", single_batch=True)
+
+    classic = backend.get_sheet(publisher._get_sheet_title("classic"))
+    single = backend.get_sheet(publisher._get_sheet_title("single"))
+    assert single.values() == classic.values()
+    assert len(single.banded_range_ids) == len(classic.banded_range_ids)
+    assert single.conditional_formats == classic.conditional_formats
+
+
+def test_single_batch_matches_classic_with_nullable_dtypes(backend, publisher):
+    df = make_summary_frame(100)
+    df.loc[3, "dimension_value"] = None
+    df.loc[4, "p_value"] = float("nan")
+    df = df.convert_dtypes()
+    publisher.create_summary_sheet(df, "classic")
+    publisher.create_summary_sheet(df, "single", single_batch=True)
+
+    classic = backend.get_sheet(publisher._get_sheet_title("classic")).values()
+    single = backend.get_sheet(publisher._get_sheet_title("single")).values()
+    assert single == classic
+    assert single[4][3] == "N/A" and single[5][8] == "N/A"
+
+
+def test_single_batch_uses_one_call(backend, publisher):
+    publisher.create_summary_sheet(make_summary_frame(100), "single", single_batch=True)
+    assert backend.stats()["calls"] == 1
+
+
+def test_update_counts_changes(backend, publisher):
+    df = make_summary_frame(200)
+    publisher.create_summary_sheet(df, "experiment", single_batch=True)
+
+    df_new = df.drop(index=[10, 11])
+    df_new.loc[20, "p_value"] = 0.5
+    added = df.loc[[12]].assign(dimension_value="new_value")
+    df_new = pd.concat([df_new, added])
+    result = publisher.update_summary_sheet(df_new, "experiment")
+
+    assert result.status == "updated"
+    assert result.changes["changed_cells"] == 1
+    assert result.changes["changed_rows"] == 1
+    assert result.changes["added_rows"] == 1
+    assert result.changes["removed_rows"] == 2
+
+    # The tab holds the same rows as a fresh publish of the new summary
+    publisher.create_summary_sheet(df_new, "fresh", single_batch=True)
+    updated = backend.get_sheet(publisher._get_sheet_title("experiment")).values()
+    fresh = backend.get_sheet(publisher._get_sheet_title("fresh")).values()
+    assert updated[0] == fresh[0]
+    assert sorted(map(str, updated[1:])) == sorted(map(str, fresh[1:]))
+
+
+def test_update_unchanged(backend, publisher):
+    df = make_summary_frame(100)
+    publisher.create_summary_sheet(df, "experiment", single_batch=True)
+    backend.reset_calls()
+
+    result = publisher.update_summary_sheet(df, "experiment")
+    assert result.status == "unchanged"
+    # Only the read of the tab
+    assert backend.stats()["calls"] == 1
+
+
+def test_cache_skips_unchanged_publish(backend, make_publisher, tmp_path):
+    publisher = make_publisher(cache=PublishCache(str(tmp_path / "cache.db")))
+    df = make_summary_frame(100)
+    assert publisher.create_summary_sheet(df, "experiment").status == "created"
+    backend.reset_calls()
+
+    result = publisher.create_summary_sheet(df, "experiment")
+    assert result.status == "skipped"
+    # Only the check that the recorded tab still exists
+    assert backend.stats()["calls"] == 1
+
+    result = publisher.create_summary_sheet(df, "experiment", force_refresh=True)
+    assert result.status == "exists"
+
+
+def test_cache_skips_unchanged_publish_on_a_later_day(
+    backend, make_publisher, tmp_path, monkeypatch
+):
+    publisher = make_publisher(cache=PublishCache(str(tmp_path / "cache.db")))
+    df = make_summary_frame(100)
+    first = publisher.create_summary_sheet(df, "experiment")
+
+    class Tomorrow(date):
+        @classmethod
+        def today(cls):
+            return date.today() + timedelta(days=1)
+
+    monkeypatch.setattr("abtest_summary.create.date", Tomorrow)
+    result = publisher.create_summary_sheet(df, "experiment")
+    assert result.status == "skipped"
+    assert (result.experiment_name, result.sheet_id) == (
+        first.experiment_name,
+        first.sheet_id,
+    )
+
+    # A deleted tab is published again
+    backend.batch_update({"requests": [{"deleteSheet": {"sheetId": first.sheet_id}}]})
+    result = publisher.create_summary_sheet(df, "experiment")
+    assert result.status == "created"
+    assert result.experiment_name == publisher._get_sheet_title("experiment")
+
+
+def test_cache_skips_unchanged_workbook_tab(backend, make_publisher, tmp_path):
+    publisher = make_publisher(cache=PublishCache(str(tmp_path / "cache.db")))
+    df = make_summary_frame(100)
+    publisher.create_workbook([(df, "a")], index_name=None)
+
+    results = publisher.create_workbook([(df, "a"), (df, "b")], index_name=None)
+    assert [result.status for result in results] == ["skipped", "created"]
+
+
+def test_failed_publish_keeps_stats(publisher):
+    events = []
+    publisher.on_event = events.append
+    df = make_summary_frame(10).drop(columns=["p_value"])
+
+    (result,) = publisher.publish_many([(df, "broken")])
+    assert result.status == "failed"
+    assert "prepare" in result.stats.phases
+    assert events[-1].kind == "publish" and events[-1].name == "failed"
+
+
+def test_update_replaces_tab_in_place(backend, publisher):
+    df = make_summary_frame(200)
+    publisher.create_summary_sheet(df, "experiment", single_batch=True)
+    sheet_id = backend.get_sheet(publisher._get_sheet_title("experiment")).sheet_id
+
+    # The adjusted p-value column changes the header, so rows cannot be matched
+    df_new = df.iloc[:150]
+    result = publisher.update_summary_sheet(df_new, "experiment", p_value_adjustment="bh")
+    assert result.status == "replaced"
+    assert result.sheet_id == sheet_id
+
+    publisher.create_summary_sheet(
+        df_new, "fresh", single_batch=True, p_value_adjustment="bh"
+    )
+    replaced = backend.get_sheet(publisher._get_sheet_title("experiment"))
+    fresh = backend.get_sheet(publisher._get_sheet_title("fresh"))
+    assert replaced.values() == fresh.values()
+    assert (replaced.row_count, replaced.column_count) == (151, fresh.column_count)
+    assert len(replaced.banded_range_ids) == 1
+    assert replaced.conditional_formats == fresh.conditional_formats
+
+
+def test_update_raises_bad_requests(backend, publisher, monkeypatch):
+    def reject(ranges=None, include_grid_data=False, sleep=True):
+        raise _http_error(400, "Invalid fields")
+
+    monkeypatch.setattr(backend, "get", reject)
+    with pytest.raises(HttpError):
+        publisher.update_summary_sheet(make_summary_frame(10), "experiment")
+    assert not backend.sheets
@@ -0,0 +1,44 @@
+import pandas as pd
+import pytest
+
+from abtest_summary.sources import iter_result_batches
+from abtest_summary.testing import make_summary_frame
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def results():
+    """Results of two experiments, as a warehouse export would hold them."""
+    return pd.concat(
+        [
+            make_summary_frame(300, seed=1).assign(experiment="checkout"),
+            make_summary_frame(300, seed=2).assign(experiment="search"),
+        ],
+        ignore_index=True,
+    )
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".parquet"])
+def test_stream_matches_publish(backend, publisher, results, tmp_path, suffix):
+    path = tmp_path / f"results{suffix}"
+    if suffix == ".csv":
+        results.to_csv(path, index=False)
+    else:
+        results.to_parquet(path, index=False)
+
+    filters = {"experiment": "checkout", "metric_alias": ["metric_0", "metric_3"]}
+    batches = iter_result_batches(path, filters=filters, batch_size=7)
+    result = publisher.stream_summary_sheet(batches, "streamed")
+    assert result.status == "created"
+
+    selected = results[
+        (results["experiment"] == "checkout")
+        & results["metric_alias"].isin(["metric_0", "metric_3"])
+    ]
+    publisher.create_summary_sheet(selected, "published", single_batch=True)
+    streamed = backend.get_sheet(publisher._get_sheet_title("streamed"))
+    published = backend.get_sheet(publisher._get_sheet_title("published"))
+    assert len(streamed.values()) == len(selected) + 1 == 31
+    assert streamed.values() == published.values()
+    assert streamed.conditional_formats == published.conditional_formats
@@ -0,0 +1,272 @@
+import math
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from abtest_summary.bootstrap import bootstrap_effects
+from abtest_summary.stats import (
+    adjust_p_values,
+    compute_effects,
+    norm_ppf,
+    norm_sf,
+    t_ppf,
+    t_sf,
+)
+
+
+def _effects_frame():
+    """A continuous and a conversion metric, one treatment each."""
+    return pd.DataFrame(
+        {
+            "metric_alias": ["revenue", "revenue", "conversion", "conversion"],
+            "dimension_name": "__total_dimension",
+            "dimension_value": "total",
+            "variant_name": ["control", "treatment"] * 2,
+            "n": [1000, 1200, 10_000, 10_000],
+            # Means 10 and 10.3, variances 4 and 5
+            "sum": [10_000.0, 12_360.0, np.nan, np.nan],
+            "sum_sq": [
+                999 * 4 + 1000 * 10**2,
+                1199 * 5 + 1200 * 10.3**2,
+                np.nan,
+                np.nan,
+            ],
+            "conversions": [np.nan, np.nan, 1000, 1100],
+        }
+    )
+
+
+def test_norm_sf_matches_erfc():
+    x = np.linspace(-10, 10, 2001)
+    expected = np.array([0.5 * math.erfc(v / math.sqrt(2)) for v in x])
+    np.testing.assert_allclose(norm_sf(x), expected, rtol=2e-7, atol=0)
+
+
+def test_norm_ppf_matches_inverse_cdf():
+    p = np.concatenate([np.logspace(-12, -1, 200), np.linspace(0.1, 0.9, 200)])
+    p = np.concatenate([p, 1 - p])
+    expected = np.array([NormalDist().inv_cdf(v) for v in p])
+    np.testing.assert_allclose(norm_ppf(p), expected, rtol=2e-9, atol=0)
+
+    edges = norm_ppf([0.0, 1.0, -0.5, 1.5])
+    assert edges[0] == -np.inf and edges[1] == np.inf
+    assert np.isnan(edges[2:]).all()
+
+
+@pytest.mark.parametrize(
+    "df, quantile, ppf, sf",
+    # Reference values from scipy.stats.t: ppf(quantile, df) and sf(2.5, df)
+    [
+        (1, 0.975, 12.706204736, 0.12111894159),
+        (4.5, 0.975, 2.6589123472, 0.029952843251),
+        (13.7, 0.995, 2.9868560442, 0.012892328236),
+        (30, 0.9, 1.3104150254, 0.0090578245340),
+    ],
+)
+def test_t_distribution_known_values(df, quantile, ppf, sf):
+    assert t_ppf(quantile, df) == pytest.approx(ppf, rel=1e-9)
+    assert t_ppf(1 - quantile, df) == pytest.approx(-ppf, rel=1e-9)
+    assert t_sf(2.5, df) == pytest.approx(sf, rel=1e-9)
+    assert t_sf(-2.5, df) == pytest.approx(1 - sf, rel=1e-9)
+
+
+def test_t_distribution_round_trips_and_tends_to_normal():
+    t = np.linspace(-6, 6, 121)
+    for df in [1, 2.5, 9, 120, 1e6]:
+        np.testing.assert_allclose(t_ppf(1 - t_sf(t, df), df), t, atol=1e-8)
+
+    np.testing.assert_allclose(t_sf(t, np.inf), norm_sf(t))
+    np.testing.assert_allclose(t_sf(t, 1e9), norm_sf(t), rtol=1e-6)
+    assert t_sf(np.inf, 5) == 0 and t_sf(-np.inf, 5) == 1 and t_sf(0, 5) == 0.5
+
+
+@pytest.mark.parametrize(
+    "metric, analysis_type, ate, se",
+    [
+        ("revenue", "Welch", 0.3, math.sqrt(5 / 1200 + 4 / 1000)),
+        ("conversion", "Z-Test", 0.01, math.sqrt((0.11 * 0.89 + 0.1 * 0.9) / 10_000)),
+    ],
+)
+def test_compute_effects(metric, analysis_type, ate, se):
+    result = compute_effects(_effects_frame(), "control", alpha=0.05)
+    row = result.set_index("metric_alias").loc[metric]
+
+    z = NormalDist().inv_cdf(0.975)
+    assert row["analysis_type"] == analysis_type
+    assert row["treatment_variant_name"] == "treatment"
+    assert row["ate"] == pytest.approx(ate)
+    # Welch's t-test approaches the z-test with over 2000 degrees of freedom
+    assert row["p_value"] == pytest.approx(math.erfc(ate / se / math.sqrt(2)), rel=2e-2)
+    assert row["ate_ci_lower"] == pytest.approx(ate - z * se, rel=1e-3)
+    assert row["ate_ci_upper"] == pytest.approx(ate + z * se, rel=1e-3)
+
+
+def test_compute_effects_known_values():
+    # Reference values from scipy.stats.ttest_ind_from_stats and scipy.stats.norm
+    result = compute_effects(_effects_frame(), "control").set_index("metric_alias")
+    revenue = result.loc["revenue"]
+    assert revenue["p_value"] == pytest.approx(9.1593779e-4, rel=1e-5)
+    assert revenue["ate_ci_lower"] == pytest.approx(0.12278074, rel=1e-5)
+    assert revenue["ate_ci_upper"] == pytest.approx(0.47721926, rel=1e-5)
+    conversion = result.loc["conversion"]
+    assert conversion["p_value"] == pytest.approx(2.105807e-2, rel=1e-5)
+    assert conversion["ate_ci_lower"] == pytest.approx(1.504059e-3, rel=1e-5)
+    assert conversion["ate_ci_upper"] == pytest.approx(1.849594e-2, rel=1e-5)
+
+
+def test_compute_effects_small_samples_use_t_distribution():
+    # Eight units per arm, means 10 and 12, variances 4 and 5: the z-test gives
+    # p = 0.059, Welch's t-test with 13.8 degrees of freedom p = 0.081
+    df = pd.DataFrame(
+        {
+            "metric_alias": "revenue",
+            "dimension_name": "__total_dimension",
+            "dimension_value": "total",
+            "variant_name": ["control", "treatment"],
+            "n": [8, 8],
+            "sum": [80.0, 96.0],
+            "sum_sq": [7 * 4 + 8 * 10**2, 7 * 5 + 8 * 12**2],
+        }
+    )
+    row = compute_effects(df, "control").iloc[0]
+
+    # Reference values from scipy.stats.ttest_ind_from_stats and scipy.stats.t
+    assert row["analysis_type"] == "Welch"
+    assert row["p_value"] == pytest.approx(8.0529276e-2, rel=1e-6)
+    assert row["ate_ci_lower"] == pytest.approx(-0.27752748, rel=1e-6)
+    assert row["ate_ci_upper"] == pytest.approx(4.2775275, rel=1e-6)
+
+
+def test_compute_effects_requires_control_rows():
+    df = _effects_frame()
+    df.loc[2, "variant_name"] = "other"
+    with pytest.raises(ValueError, match="no 'control' row"):
+        compute_effects(df, "control")
+
+
+def test_bootstrap_effects_requires_control_units():
+    df = _units_frame()
+    df.loc[df["metric_alias"] == "orders", "variant_name"] = "a"
+    with pytest.raises(ValueError, match=r"no 'control' units for 1 .*'orders'"):
+        bootstrap_effects(df, "control", max_workers=1)
+
+    # Units with a missing key are compared with the control units missing it too
+    df = _units_frame()
+    orders = df["metric_alias"] == "orders"
+    df.loc[orders, "dimension_value"] = np.nan
+    result = bootstrap_effects(df, "control", n_resamples=100, max_workers=1)
+    assert result["dimension_value"].isna().sum() == 2
+    df.loc[orders & (df["variant_name"] == "control"), "dimension_value"] = "total"
+    with pytest.raises(ValueError, match="no 'control' units for 2 "):
+        bootstrap_effects(df, "control", max_workers=1)
+
+
+def _reference_adjustment(p_values, method):
+    """Textbook adjustment of one family, missing p-values excluded."""
+    tested = [i for i, p in enumerate(p_values) if not math.isnan(p)]
+    order = sorted(tested, key=lambda i: p_values[i])
+    m = len(order)
+    adjusted = [math.nan] * len(p_values)
+    for rank, i in enumerate(order, start=1):
+        if method == "bonferroni":
+            value = m * p_values[i]
+        elif method == "holm":
+            value = max(
+                (m - k + 1) * p_values[j] for k, j in enumerate(order[:rank], 1)
+            )
+        else:
+            value = min(
+                m * p_values[j] / k for k, j in enumerate(order, 1) if k >= rank
+            )
+        adjusted[i] = min(value, 1.0)
+    return adjusted
+
+
+def test_adjust_p_values_known_values():
+    p = [0.01, 0.04, 0.03, 0.005]
+    np.testing.assert_allclose(adjust_p_values(p, "bh"), [0.02, 0.04, 0.04, 0.02])
+    np.testing.assert_allclose(adjust_p_values(p, "holm"), [0.03, 0.06, 0.06, 0.02])
+    np.testing.assert_allclose(
+        adjust_p_values(p, "bonferroni"), [0.04, 0.16, 0.12, 0.02]
+    )
+
+
+@pytest.mark.parametrize("method", ["bh", "holm", "bonferroni"])
+def test_adjust_p_values_matches_reference(method):
+    rng = np.random.default_rng(3)
+    p = rng.uniform(0, 0.2, 300)
+    p[rng.choice(300, 30, replace=False)] = np.nan
+    # Ties, within and across families
+    p[:10] = 0.05
+    groups = pd.DataFrame(
+        {"metric": rng.choice(["a", "b", "c"], 300), "split": rng.choice([1, 2], 300)}
+    )
+
+    result = adjust_p_values(p, method)
+    np.testing.assert_allclose(result, _reference_adjustment(list(p), method))
+
+    result = adjust_p_values(p, method, groups)
+    for _, index in groups.groupby(["metric", "split"]).indices.items():
+        np.testing.assert_allclose(
+            result[index], _reference_adjustment(list(p[index]), method)
+        )
+
+    # Labels and a one-column frame define the same families
+    np.testing.assert_allclose(
+        adjust_p_values(p, method, groups["metric"].to_numpy()),
+        adjust_p_values(p, method, groups[["metric"]]),
+    )
+
+
+def test_adjust_p_values_rejects_unknown_method():
+    with pytest.raises(ValueError, match="Unknown p-value adjustment"):
+        adjust_p_values([0.1], "fdr")
+
+
+def _units_frame(seed=0):
+    """Per-unit values of two metrics, each with a control and two treatments."""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for metric, shift in (("revenue", 0.5), ("orders", 0.0)):
+        for variant, lift in (("control", 0.0), ("a", shift), ("b", -shift)):
+            n = int(rng.integers(200, 400))
+            frames.append(
+                pd.DataFrame(
+                    {
+                        "metric_alias": metric,
+                        "dimension_name": "__total_dimension",
+                        "dimension_value": "total",
+                        "variant_name": variant,
+                        "value": rng.lognormal(1 + lift, 1, n),
+                    }
+                )
+            )
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_bootstrap_is_reproducible_across_workers():
+    df = _units_frame()
+    kwargs = {"n_resamples": 500, "seed": 7, "max_batch_elements": 10_000}
+    serial = bootstrap_effects(df, "control", max_workers=1, **kwargs)
+    parallel = bootstrap_effects(df, "control", max_workers=2, **kwargs)
+    pd.testing.assert_frame_equal(serial, parallel)
+
+
+def test_bootstrap_effects():
+    df = _units_frame()
+    result = bootstrap_effects(df, "control", n_resamples=1000, max_workers=1)
+    assert len(result) == 4
+    assert (result["analysis_type"] == "Bootstrap").all()
+
+    means = df.groupby(["metric_alias", "variant_name"])["value"].mean()
+    for row in result.itertuples():
+        control = means[row.metric_alias, "control"]
+        treatment = means[row.metric_alias, row.treatment_variant_name]
+        assert row.ate == pytest.approx(treatment - control)
+        assert row.ate_ci_lower < row.ate < row.ate_ci_upper
+    # A large lift is significant, no lift is not
+    p_values = result.set_index(["metric_alias", "treatment_variant_name"])["p_value"]
+    assert p_values["revenue", "a"] < 0.01
+    assert p_values["orders", "a"] > 0.01